@@ -0,0 +1,234 @@
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+
+import requests
+import tweepy
+
+from cache_utils import TTLCache
+from rate_limits import RateLimitBudget, endpoint_for_route
+
+logger = logging.getLogger(__name__)
+
+# Multi-ID user lookups accept at most 100 IDs per request
+USER_LOOKUP_BATCH_SIZE = 100
+
+# Route keys as recorded by RateLimitTrackingClient
+SEARCH_RECENT_ROUTE = "GET /2/tweets/search/recent"
+
+# Rate-limit budget endpoint drawn from by each adapter method
+METHOD_ENDPOINTS = {
+    "search_recent_tweets": "search",
+    "get_tweet": "tweet_lookup",
+    "get_tweets": "tweet_lookup",
+    "get_user": "user_lookup",
+    "get_users": "user_lookup",
+    "get_me": "user_lookup",
+    "create_tweet": "create_tweet",
+}
+
+class RateLimitTrackingClient(tweepy.Client):
+    """
+    tweepy.Client that remembers the x-rate-limit-* headers of the last response
+    per route and, when given a RateLimitBudget, keeps its buckets in sync.
+    """
+
+    def __init__(self, *args, budget: Optional[RateLimitBudget] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+        self.rate_limits: Dict[str, Dict[str, int]] = {}
+
+    def request(self, method, route, params=None, json=None, user_auth=False):
+        try:
+            response = super().request(method, route, params=params, json=json, user_auth=user_auth)
+        except tweepy.HTTPException as e:
+            self._record_rate_limit(method, route, e.response.headers)
+            if self.budget and isinstance(e, tweepy.TooManyRequests):
+                self.budget.record_throttled(endpoint_for_route(method, route), e.response.headers)
+            raise
+        self._record_rate_limit(method, route, response.headers)
+        return response
+
+    def _record_rate_limit(self, method, route, headers):
+        if self.budget:
+            self.budget.update_from_headers(endpoint_for_route(method, route), headers)
+        try:
+            limit = headers.get("x-rate-limit-limit")
+            remaining = headers.get("x-rate-limit-remaining")
+            reset = headers.get("x-rate-limit-reset")
+            if remaining is None:
+                return
+            self.rate_limits[f"{method} {route}"] = {
+                "limit": int(limit) if limit is not None else None,
+                "remaining": int(remaining),
+                "reset": int(reset) if reset is not None else None,
+                "observed_at": int(time.time())
+            }
+        except (TypeError, ValueError):
+            pass
+
+def reached_twitter(error: Exception) -> bool:
+    """Whether a failed call got as far as Twitter (and so used its rate-limit capacity)"""
+    return getattr(error, "response", None) is not None or isinstance(error, requests.exceptions.ReadTimeout)
+
+class UserDirectory:
+    """In-process LRU directory of user ID -> username/name, filled from API responses"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 24 * 3600):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def add(self, user):
+        if getattr(user, 'id', None) is None or not getattr(user, 'username', None):
+            return
+        self.cache.set(str(user.id), {"username": user.username, "name": user.name})
+
+    def absorb(self, response):
+        """Record every user carried by a tweepy Response (includes and user payloads)"""
+        includes = getattr(response, 'includes', None) or {}
+        for user in includes.get('users', []):
+            self.add(user)
+
+        data = getattr(response, 'data', None)
+        for item in (data if isinstance(data, list) else [data]):
+            if isinstance(item, tweepy.User):
+                self.add(item)
+
+    def get(self, user_id) -> dict:
+        return self.cache.get(str(user_id))
+
+    def get_stats(self) -> dict:
+        return self.cache.get_stats()
+
+class AsyncTwitterClient:
+    """
+    Async adapter that runs blocking tweepy.Client calls on a bounded thread pool.
+
+    With a budget, every call first reserves its endpoint's capacity, waiting up
+    to max_budget_wait seconds before raising RateLimitExhausted.
+    """
+
+    def __init__(self, client: tweepy.Client, max_workers: int = 8, user_directory_size: int = 10000,
+                 budget: Optional[RateLimitBudget] = None, max_budget_wait: float = 30.0):
+        self.client = client
+        self.budget = budget
+        self.max_budget_wait = max_budget_wait
+        self.users = UserDirectory(maxsize=user_directory_size)
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="twitter-io")
+        self.started_at = time.monotonic()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.endpoint_stats: Dict[str, Dict[str, Any]] = {}
+        self.loop_lag = {"max_secs": 0.0, "total_secs": 0.0, "samples": 0}
+
+    async def _call(self, method_name: str, *args, **kwargs):
+        """Run one tweepy.Client method in the executor and record its I/O time"""
+        loop = asyncio.get_running_loop()
+        method = getattr(self.client, method_name)
+        stats = self.endpoint_stats.setdefault(method_name, {"calls": 0, "errors": 0, "io_secs": 0.0})
+        if self.budget:
+            await self.budget.reserve(METHOD_ENDPOINTS[method_name], max_wait=self.max_budget_wait)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            response = await loop.run_in_executor(self.executor, functools.partial(method, *args, **kwargs))
+            self.users.absorb(response)
+            return response
+        except Exception as e:
+            stats["errors"] += 1
+            if self.budget and not reached_twitter(e):
+                # Connection errors and executor failures never reached Twitter
+                self.budget.release(METHOD_ENDPOINTS[method_name])
+            raise
+        finally:
+            stats["calls"] += 1
+            stats["io_secs"] += time.perf_counter() - start
+            self.in_flight -= 1
+
+    async def search_recent_tweets(self, query: str, **kwargs):
+        return await self._call("search_recent_tweets", query, **kwargs)
+
+    async def get_tweet(self, id, **kwargs):
+        return await self._call("get_tweet", id, **kwargs)
+
+    async def get_tweets(self, ids, **kwargs):
+        return await self._call("get_tweets", ids, **kwargs)
+
+    async def get_user(self, **kwargs):
+        return await self._call("get_user", **kwargs)
+
+    async def get_users(self, ids, **kwargs):
+        return await self._call("get_users", ids=ids, **kwargs)
+
+    async def lookup_users(self, user_ids: Iterable) -> Dict[str, dict]:
+        """
+        Resolve user IDs to {'username', 'name'}: directory first, then one batched
+        get_users call per 100 missing IDs. Unknown IDs are left out of the result.
+        """
+        ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        found = {user_id: self.users.get(user_id) for user_id in ids}
+        missing = [user_id for user_id, info in found.items() if info is None]
+
+        for start in range(0, len(missing), USER_LOOKUP_BATCH_SIZE):
+            batch = missing[start:start + USER_LOOKUP_BATCH_SIZE]
+            try:
+                await self.get_users(batch, user_fields=["username", "name"])
+            except Exception as e:
+                logger.error(f"Failed to look up {len(batch)} users: {e}")
+            for user_id in batch:
+                found[user_id] = self.users.get(user_id)
+
+        return {user_id: info for user_id, info in found.items() if info is not None}
+
+    async def get_me(self, **kwargs):
+        return await self._call("get_me", **kwargs)
+
+    async def create_tweet(self, **kwargs):
+        return await self._call("create_tweet", **kwargs)
+
+    def get_rate_limit(self, route_key: str) -> Dict[str, int]:
+        """Last seen rate-limit headers for a route (empty if unknown or expired)"""
+        info = getattr(self.client, "rate_limits", {}).get(route_key)
+        if not info or (info.get("reset") and info["reset"] < time.time()):
+            return {}
+        return info
+
+    async def monitor_loop_lag(self, interval: float = 1.0):
+        """Measure how late the event loop wakes up; large values mean something blocked it"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected)
+            self.loop_lag["samples"] += 1
+            self.loop_lag["total_secs"] += lag
+            self.loop_lag["max_secs"] = max(self.loop_lag["max_secs"], lag)
+
+    def get_stats(self) -> dict:
+        """Time spent waiting on Twitter I/O (off the loop) versus time the loop was blocked"""
+        uptime = time.monotonic() - self.started_at
+        io_secs = sum(s["io_secs"] for s in self.endpoint_stats.values())
+        return {
+            "uptime_secs": round(uptime, 1),
+            "twitter_io_secs": round(io_secs, 2),
+            "loop_blocked_secs": round(self.loop_lag["total_secs"], 2),
+            "loop_lag_max_secs": round(self.loop_lag["max_secs"], 3),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_workers": self.max_workers,
+            "user_directory": self.users.get_stats(),
+            "rate_limits": dict(getattr(self.client, "rate_limits", {})),
+            "endpoints": {
+                name: {**s, "io_secs": round(s["io_secs"], 2)}
+                for name, s in self.endpoint_stats.items()
+            }
+        }
+
+    def shutdown(self):
+        """Stop accepting work; in-flight calls are left to finish"""
+        self.executor.shutdown(wait=False)
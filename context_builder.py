@@ -0,0 +1,195 @@
+import re
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def approx_token_count(text: str) -> int:
+    """
+    Tokenizer-free estimate: words and punctuation marks, with long words
+    counted as one token per four characters (close to BPE tokenizers on
+    English and Hinglish tweets)
+    """
+    return sum(max(1, len(piece) // 4) if piece[0].isalnum() else 1 for piece in TOKEN_PATTERN.findall(text))
+
+# Section name -> (priority, max tokens). Lower priorities get their share of the
+# budget first; a section that no longer fits is truncated, then dropped. While
+# the caps of the first three fit in the budget, the conversation's original
+# tweet and its media always render the same, keeping the prompt prefix cacheable.
+DEFAULT_SECTION_LIMITS: Dict[str, Tuple[int, Optional[int]]] = {
+    "request": (0, 300),
+    "original": (1, 200),
+    "original_media": (2, 250),
+    "shared": (3, 400),
+    "media": (4, 400),
+    "replies": (5, 250),
+}
+
+ELLIPSIS = " …"
+
+@dataclass
+class Section:
+    name: str
+    text: str
+    priority: int
+    max_tokens: Optional[int]
+    order: int  # position in the rendered prompt
+
+
+@dataclass
+class BuiltContext:
+    text: str
+    tokens: int
+    budget: int
+    truncated: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+
+class ContextBuilder:
+    """
+    Assembles an LLM prompt from named sections within a token budget.
+
+    Sections are rendered in the order they were added, but the budget is
+    handed out by priority (then order): each section gets up to its cap and
+    what is left of the budget. A section that does not fit is cut at a line
+    or word boundary (marked with "…"), or dropped if less than min_tokens
+    would remain. The result depends only on the inputs, so the same mention
+    always produces the same prompt.
+    """
+
+    def __init__(self, budget: int, tokenizer: Callable[[str], int] = approx_token_count,
+                 limits: Optional[Dict[str, Tuple[int, Optional[int]]]] = None, min_tokens: int = 8):
+        self.budget = budget
+        self.tokenizer = tokenizer
+        self.limits = {**DEFAULT_SECTION_LIMITS, **(limits or {})}
+        self.min_tokens = min_tokens
+        self.sections: List[Section] = []
+
+    def add(self, name: str, text: str, priority: Optional[int] = None, max_tokens: Optional[int] = None):
+        """Add a section; priority and cap default to the configured limits for its name"""
+        if not text:
+            return self
+        default_priority, default_cap = self.limits.get(name, (len(self.limits), None))
+        self.sections.append(Section(
+            name=name,
+            text=text,
+            priority=default_priority if priority is None else priority,
+            max_tokens=default_cap if max_tokens is None else max_tokens,
+            order=len(self.sections)
+        ))
+        return self
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix ending at a line (else word) boundary that fits in max_tokens"""
+        if self.tokenizer(text) <= max_tokens:
+            return text
+        limit = max_tokens - self.tokenizer(ELLIPSIS)
+
+        lines = text.split("\n")
+        kept = self._longest_fitting(lines, "\n", limit)
+        if kept and self.tokenizer("\n".join(lines[:kept])) >= limit // 2:
+            return "\n".join(lines[:kept]) + ELLIPSIS
+
+        words = text.split(" ")
+        kept = self._longest_fitting(words, " ", limit)
+        return (" ".join(words[:kept]).rstrip(" ,;:|-") + ELLIPSIS) if kept else ""
+
+    def _longest_fitting(self, pieces: List[str], separator: str, limit: int) -> int:
+        low, high = 0, len(pieces)
+        while low < high:  # binary search on the number of leading pieces
+            middle = (low + high + 1) // 2
+            if self.tokenizer(separator.join(pieces[:middle])) <= limit:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def build(self) -> BuiltContext:
+        remaining = self.budget
+        rendered: Dict[int, str] = {}
+        result = BuiltContext(text="", tokens=0, budget=self.budget)
+
+        for section in sorted(self.sections, key=lambda s: (s.priority, s.order)):
+            allowance = remaining if section.max_tokens is None else min(section.max_tokens, remaining)
+            text = section.text
+            if self.tokenizer(text) > allowance:
+                text = self.truncate(text, allowance) if allowance >= self.min_tokens else ""
+                if not text:
+                    result.dropped.append(section.name)
+                    continue
+                result.truncated.append(section.name)
+            rendered[section.order] = text
+            remaining -= self.tokenizer(text)
+
+        result.text = "\n".join(rendered[order] for order in sorted(rendered))
+        result.tokens = self.tokenizer(result.text)
+        if result.truncated or result.dropped:
+            logger.info(f"✂️ Prompt fit to {result.tokens}/{self.budget} tokens "
+                        f"(truncated: {result.truncated}, dropped: {result.dropped})")
+        return result
+
+
+async def _run_latency_benchmark(port: int = 8766, base_secs: float = 0.3, secs_per_token: float = 0.0008,
+                                 runs: int = 3):
+    """
+    Prompt size against LLM latency with a local stand-in whose response time
+    grows with the prompt (base_secs plus secs_per_token per prompt token, the
+    shape of a real model's prefill). The same viral-thread mention, with a long
+    joined media description, is built unbudgeted and at several budgets.
+    """
+    from aiohttp import web
+    from llm_client import LLMClient
+
+    async def answer(request):
+        question = request.query.get("question", "")
+        await asyncio.sleep(base_secs + secs_per_token * approx_token_count(question))
+        return web.json_response({"response": "This video is from 2019 and unrelated to the claim."})
+
+    app = web.Application()
+    app.router.add_get("/query", answer)
+    runner = web.AppRunner(app, max_line_size=1 << 20, max_field_size=1 << 20)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    frame = ("Frame {}: a crowd gathers near a railway station at night, several people hold phones, "
+             "a banner in Hindi is partly visible and smoke rises behind a parked bus")
+    sections = [
+        ("original", 'ORIGINAL TWEET by @newsdesk: "Shocking visuals from the station tonight, '
+                     'police say the situation is under control" [Original tweet has 4 media files]'),
+        ("shared", "\nSHARED TWEETS (3 tweets):\n" + "\n".join(
+            f'Tweet {i} by @user{i}: "' + "Is this the same video that went viral last year? " * 4 + '"'
+            for i in range(1, 4))),
+        ("media", "\nMEDIA CONTENT: " + " | ".join(frame.format(i) for i in range(1, 41))),
+        ("request", "\nUSER REQUEST: is this video from today or is it old?"),
+    ]
+
+    client = LLMClient(f"http://127.0.0.1:{port}/query")
+    print("budget     prompt_tokens  prompt_chars  latency_s  truncated/dropped")
+    try:
+        for budget in (None, 2000, 1000, 600, 300):
+            builder = ContextBuilder(budget or 10 ** 9, limits={} if budget else
+                                     {name: (priority, None) for name, (priority, _) in DEFAULT_SECTION_LIMITS.items()})
+            for name, text in sections:
+                builder.add(name, text)
+            built = builder.build()
+
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                await client.query({"question": built.text, "thread_id": "bench"})
+                timings.append(time.perf_counter() - start)
+            label = str(budget) if budget else "unbudgeted"
+            print(f"{label:10} {built.tokens:13d}  {len(built.text):12d}  {min(timings):9.2f}  "
+                  f"{','.join(built.truncated) or '-'}/{','.join(built.dropped) or '-'}")
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_latency_benchmark())
@@ -0,0 +1,188 @@
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from cache_utils import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Context fields each profile's prompt actually reads; nothing else is fetched
+CONTEXT_PROFILES: Dict[str, tuple] = {
+    "minimal": (),                                               # mention text only
+    "root": ("original_tweet", "media_content"),                 # conversation root and its media
+    "thread": ("original_tweet", "media_content", "reply_chain"),  # plus recent replies
+}
+
+def reply_content(tweet, users: dict) -> dict:
+    """Tweet content dict (as stored in the conversation index) for a conversation search result"""
+    author = users.get(str(tweet.author_id))
+    parents = [ref.id for ref in getattr(tweet, 'referenced_tweets', None) or [] if ref.type == 'replied_to']
+    return {
+        'id': tweet.id,
+        'text': tweet.text,
+        'created_at': tweet.created_at,
+        'author_id': tweet.author_id,
+        'author': {'username': author.username, 'name': author.name} if author else {'username': 'unknown', 'name': 'Unknown'},
+        'conversation_id': getattr(tweet, 'conversation_id', None),
+        'in_reply_to_id': parents[0] if parents else None,
+        'media': [],
+        'media_objects': []
+    }
+
+def chain_entry(reply: dict) -> dict:
+    return {
+        'id': reply['id'],
+        'text': reply['text'],
+        'author_id': reply['author_id'],
+        'created_at': reply['created_at']
+    }
+
+def empty_context() -> dict:
+    return {
+        'original_tweet': None,
+        'reply_chain': [],
+        'media_content': [],
+        'conversation_summary': ""
+    }
+
+class ConversationContextLoader:
+    """
+    Loads only the conversation context fields the active profile uses.
+
+    The root tweet is looked up (from the poll cycle's hydrated tweets when
+    possible) only if the profile reads original_tweet or media_content, and the
+    conversation_id: reply search runs only for reply_chain and never when the
+    mention is itself the conversation root. load_conversation() returns what
+    every mention of a conversation shares (and may be cached per
+    conversation); for_mention() adds what is specific to one mention. With a
+    ConversationIndex, repeat searches of a conversation only ask for tweets
+    newer than the previous search returned, and each mention's chain starts
+    with its own ancestors walked locally. api_calls counts the Twitter
+    requests each kind of field has cost.
+    """
+
+    def __init__(self, twitter, fetch_tweet: Callable[[str], Awaitable[Optional[dict]]],
+                 profile: str = "root", reply_chain_size: int = 10, index=None):
+        if profile not in CONTEXT_PROFILES:
+            raise ValueError(f"Unknown context profile {profile!r}; expected one of {sorted(CONTEXT_PROFILES)}")
+        self.twitter = twitter
+        self.fetch_tweet = fetch_tweet
+        self.profile = profile
+        self.fields = set(CONTEXT_PROFILES[profile])
+        self.reply_chain_size = reply_chain_size
+        self.index = index  # optional ConversationIndex of tweets already seen
+        self.api_calls = {"root_lookup": 0, "reply_search": 0}
+        self.skipped = {"root_lookup": 0, "reply_search": 0}
+        # conversation_id -> newest reply ID the last search returned (its since_id next time)
+        self.searched = TTLCache(maxsize=5000, ttl=24 * 3600)
+
+    @property
+    def needs_root(self) -> bool:
+        """Whether the profile reads the conversation root (so hydration should fetch it)"""
+        return bool(self.fields & {"original_tweet", "media_content"})
+
+    def cache_key(self, mention_id, conversation_id) -> str:
+        """Shared contexts differ only by conversation, except that a root mention skips the replies"""
+        is_root = str(conversation_id) == str(mention_id)
+        return f"{conversation_id}:root" if is_root and "reply_chain" in self.fields else str(conversation_id)
+
+    async def load(self, mention_id, conversation_id, hydrated: dict = None) -> dict:
+        context = await self.load_conversation(mention_id, conversation_id, hydrated)
+        return self.for_mention(context, mention_id, conversation_id)
+
+    async def load_conversation(self, mention_id, conversation_id, hydrated: dict = None) -> dict:
+        """The part of a mention's context shared by every mention with the same cache_key"""
+        context = empty_context()
+        if not conversation_id:
+            return context
+
+        try:
+            if self.needs_root:
+                await self._load_root(context, conversation_id, hydrated or {})
+            else:
+                self.skipped["root_lookup"] += 1
+
+            if "reply_chain" in self.fields and str(conversation_id) != str(mention_id):
+                await self._load_reply_chain(context, conversation_id)
+            else:
+                self.skipped["reply_search"] += 1
+        except Exception as e:
+            logger.error(f"❌ Error getting conversation context: {e}")
+
+        return context
+
+    async def _load_root(self, context: dict, conversation_id, hydrated: dict):
+        root_content = hydrated.get(str(conversation_id))
+        if root_content is None:
+            logger.info(f"🔍 Fetching original tweet {conversation_id} for context")
+            self.api_calls["root_lookup"] += 1
+            root_content = await self.fetch_tweet(str(conversation_id))
+        else:
+            self.skipped["root_lookup"] += 1
+        if not root_content:
+            return
+
+        if "original_tweet" in self.fields:
+            context['original_tweet'] = {
+                'id': root_content['id'],
+                'text': root_content['text'],
+                'author_id': root_content['author_id'],
+                'created_at': root_content['created_at'],
+                'author': root_content['author'],
+                'media': list(root_content['media'])
+            }
+            logger.info(f"✅ Found original tweet by @{root_content['author']['username']}")
+        if "media_content" in self.fields:
+            context['media_content'] = list(root_content['media_objects'])
+
+    def for_mention(self, context: dict, mention_id, conversation_id) -> dict:
+        """Copy of a shared context whose reply chain starts with the mention's own ancestors"""
+        if "reply_chain" not in self.fields or str(conversation_id) == str(mention_id):
+            return context
+        ancestors = self.index.ancestors(mention_id) if self.index is not None else []
+        chain = []
+        seen = {str(mention_id), str(conversation_id)}  # already in the prompt as the request / original tweet
+        for reply in ancestors + context['reply_chain']:
+            if str(reply['id']) in seen or len(chain) >= self.reply_chain_size:
+                continue
+            seen.add(str(reply['id']))
+            chain.append(chain_entry(reply))
+        if chain:
+            logger.info(f"📝 Found {len(chain)} replies in conversation")
+        return {**context, 'reply_chain': chain}
+
+    async def _load_reply_chain(self, context: dict, conversation_id):
+        # With an index, a conversation searched before only needs replies newer than that search
+        since_id = self.searched.get(str(conversation_id)) if self.index is not None else None
+        params = {
+            "query": f"conversation_id:{conversation_id}",
+            "max_results": self.reply_chain_size,
+            "tweet_fields": ["author_id", "created_at", "conversation_id", "referenced_tweets"],
+            "user_fields": ["username", "name"],
+            "expansions": ["author_id"]
+        }
+        if since_id:
+            params["since_id"] = since_id
+
+        self.api_calls["reply_search"] += 1
+        replies = []
+        try:
+            conversation_search = await self.twitter.search_recent_tweets(**params)
+            users = {str(user.id): user for user in (conversation_search.includes or {}).get('users', [])}
+            replies = [reply_content(reply, users) for reply in conversation_search.data or []]
+        except Exception as e:
+            logger.warning(f"⚠️ Could not fetch conversation replies: {e}")
+
+        if self.index is not None:
+            self.index.add(replies)
+            if replies:
+                self.searched.set(str(conversation_id), max(int(reply['id']) for reply in replies))
+            replies = self.index.recent_in_conversation(conversation_id, self.reply_chain_size + 2)
+
+        # Newest replies first, with room for the one a mention drops as its own text
+        for reply in replies:
+            if str(reply['id']) == str(conversation_id) or len(context['reply_chain']) > self.reply_chain_size:
+                continue
+            context['reply_chain'].append(chain_entry(reply))
+
+    def get_stats(self) -> dict:
+        return {"profile": self.profile, "api_calls": dict(self.api_calls), "skipped": dict(self.skipped)}
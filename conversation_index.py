@@ -0,0 +1,181 @@
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import tweepy
+
+from state_store import open_state_db
+
+logger = logging.getLogger(__name__)
+
+def encode_tweet_content(content: dict) -> str:
+    """Compact JSON for a tweet content dict (media objects are stored as their raw API data)"""
+    created_at = content.get('created_at')
+    payload = {
+        'text': content.get('text', ""),
+        'author_id': content.get('author_id'),
+        'created_at': created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+        'author': content.get('author'),
+        'media': content.get('media') or [],
+        'media_data': [media.data for media in content.get('media_objects') or []]
+    }
+    return json.dumps(payload, separators=(",", ":"), default=str)
+
+def decode_tweet_content(tweet_id: int, conversation_id: Optional[int], in_reply_to_id: Optional[int],
+                         payload: str) -> dict:
+    data = json.loads(payload)
+    created_at = data.get('created_at')
+    if created_at:
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            pass
+    return {
+        'id': tweet_id,
+        'text': data['text'],
+        'created_at': created_at,
+        'author_id': data.get('author_id'),
+        'author': data.get('author') or {'username': 'unknown', 'name': 'Unknown'},
+        'conversation_id': conversation_id,
+        'in_reply_to_id': in_reply_to_id,
+        'media': data.get('media') or [],
+        'media_objects': [tweepy.Media(media_data) for media_data in data.get('media_data') or []]
+    }
+
+
+class ConversationIndex:
+    """
+    Local store of every tweet the bot has seen, indexed by conversation_id and
+    in_reply_to_id.
+
+    Tweets the bot already has (mentions, search includes, hydrated roots,
+    conversation searches) are answered locally and ancestors of a tweet are
+    walked without API calls. Rows live in sqlite (one integer-keyed row with a
+    compact JSON payload per tweet) and are pruned after retention_secs or,
+    oldest first, beyond max_tweets.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, retention_secs: int = 3 * 24 * 3600,
+                 max_tweets: int = 200_000, prune_every_secs: int = 600):
+        self.retention_secs = retention_secs
+        self.max_tweets = max_tweets
+        self.prune_every_secs = prune_every_secs
+        self._last_prune = 0.0
+        self.stats = {"stored": 0, "hits": 0, "misses": 0, "ancestor_walks": 0, "pruned": 0}
+
+        self.db = open_state_db(db_path or ":memory:")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS conversation_tweets ("
+            "tweet_id INTEGER PRIMARY KEY, conversation_id INTEGER, in_reply_to_id INTEGER, "
+            "seen_at REAL NOT NULL, payload TEXT NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_conversation_tweets_conversation "
+            "ON conversation_tweets(conversation_id, tweet_id)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_conversation_tweets_seen ON conversation_tweets(seen_at)")
+        self.db.commit()
+        self._prune(time.time())
+
+    @staticmethod
+    def _int_or_none(value) -> Optional[int]:
+        return int(value) if value else None
+
+    def add(self, contents: Iterable[dict]) -> int:
+        """Store tweet content dicts (they need 'id'; conversation_id/in_reply_to_id when known)"""
+        now = time.time()
+        rows = [
+            (int(content['id']), self._int_or_none(content.get('conversation_id')),
+             self._int_or_none(content.get('in_reply_to_id')), now, encode_tweet_content(content))
+            for content in contents if content and content.get('id')
+        ]
+        if not rows:
+            return 0
+        self.db.executemany(
+            "INSERT OR REPLACE INTO conversation_tweets "
+            "(tweet_id, conversation_id, in_reply_to_id, seen_at, payload) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self.db.commit()
+        self.stats["stored"] += len(rows)
+        if now - self._last_prune > self.prune_every_secs:
+            self._prune(now)
+        return len(rows)
+
+    def get_many(self, tweet_ids: Iterable) -> Dict[str, dict]:
+        """Locally known tweets among tweet_ids, keyed by string ID"""
+        ids = list({int(tweet_id) for tweet_id in tweet_ids})
+        found = {}
+        for start in range(0, len(ids), 500):  # stay under sqlite's bound-parameter limit
+            chunk = ids[start:start + 500]
+            rows = self.db.execute(
+                "SELECT tweet_id, conversation_id, in_reply_to_id, payload FROM conversation_tweets "
+                f"WHERE tweet_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in rows:
+                found[str(row[0])] = decode_tweet_content(*row)
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(ids) - len(found)
+        return found
+
+    def get(self, tweet_id) -> Optional[dict]:
+        return self.get_many([tweet_id]).get(str(tweet_id))
+
+    def ancestors(self, tweet_id, max_depth: int = 20) -> List[dict]:
+        """Locally known parents of a tweet, nearest first, stopping at the first unknown one"""
+        self.stats["ancestor_walks"] += 1
+        chain = []
+        row = self.db.execute(
+            "SELECT in_reply_to_id FROM conversation_tweets WHERE tweet_id = ?", (int(tweet_id),)
+        ).fetchone()
+        parent_id = row[0] if row else None
+        while parent_id and len(chain) < max_depth:
+            row = self.db.execute(
+                "SELECT tweet_id, conversation_id, in_reply_to_id, payload FROM conversation_tweets "
+                "WHERE tweet_id = ?", (parent_id,)
+            ).fetchone()
+            if row is None:
+                break
+            chain.append(decode_tweet_content(*row))
+            parent_id = row[2]
+        return chain
+
+    def recent_in_conversation(self, conversation_id, limit: int = 10) -> List[dict]:
+        """Newest locally known tweets of a conversation, newest first"""
+        rows = self.db.execute(
+            "SELECT tweet_id, conversation_id, in_reply_to_id, payload FROM conversation_tweets "
+            "WHERE conversation_id = ? ORDER BY tweet_id DESC LIMIT ?",
+            (int(conversation_id), limit)
+        )
+        return [decode_tweet_content(*row) for row in rows]
+
+    def _prune(self, now: float):
+        self._last_prune = now
+        pruned = self.db.execute(
+            "DELETE FROM conversation_tweets WHERE seen_at < ?", (now - self.retention_secs,)
+        ).rowcount
+        count = self.db.execute("SELECT COUNT(*) FROM conversation_tweets").fetchone()[0]
+        if count > self.max_tweets:
+            pruned += self.db.execute(
+                "DELETE FROM conversation_tweets WHERE tweet_id IN "
+                "(SELECT tweet_id FROM conversation_tweets ORDER BY seen_at LIMIT ?)",
+                (count - self.max_tweets,)
+            ).rowcount
+        self.db.commit()
+        if pruned:
+            self.stats["pruned"] += pruned
+            logger.info(f"🧹 Pruned {pruned} tweets from the conversation index")
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM conversation_tweets").fetchone()[0]
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "size": len(self), "max_tweets": self.max_tweets}
+
+    def close(self):
+        if self.db:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import time
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rules are tried in order; a rule matches when its pattern matches the whole
+# cleaned mention text (case-insensitive). "in_replies" rules also apply to
+# mentions that reply to another tweet; other rules only to standalone
+# mentions, since "@bot" under a post usually means "check this".
+DEFAULT_RULES = [
+    {
+        "name": "thanks",
+        "pattern": r"(thanks?( you| u)?|thank ?you|thx|ty|tysm|dhanyavaad|shukriya)( so much| a lot)?( boom)?[\s!.🙏❤️]*",
+        "replies": [
+            "You're welcome! Tag us anytime you want something fact-checked.",
+            "Happy to help! Tag us whenever you come across a claim worth checking.",
+            "Glad it helped! Keep tagging us on posts you'd like verified."
+        ],
+        "in_replies": True
+    },
+    {
+        "name": "greeting",
+        "pattern": r"(hi+|hello+|hey+|namaste|good (morning|afternoon|evening))( there| boom| team)?[\s!.👋]*",
+        "replies": [
+            "Hi! Tag us in reply to a post, or share its link with us, and we'll fact-check it.",
+            "Hello! Tag us under a tweet or send us a link to it and we'll check the claim.",
+            "Hey there! Mention us in reply to any post you want fact-checked."
+        ]
+    },
+    {
+        "name": "help",
+        "pattern": r"(help|how (does|do) (this|it|you) work|what can you do|how to use( this| you)?|commands?)[\s?!.]*",
+        "replies": [
+            "Reply to any tweet and tag us, or share a tweet link with your question, and we'll check the claim and any photos or videos in it.",
+            "Tag us in a reply to the post you want checked, or paste its link with your question. We look at the text and any media."
+        ]
+    },
+]
+
+def load_rules(source: Optional[str]) -> List[dict]:
+    """
+    Rules from inline JSON or a JSON file path (DEFAULT_RULES when unset or
+    invalid). Rules whose pattern does not compile are skipped.
+    """
+    if not source:
+        return DEFAULT_RULES
+    try:
+        if os.path.isfile(source):
+            with open(source, encoding="utf-8") as rules_file:
+                rules = json.load(rules_file)
+        else:
+            rules = json.loads(source)
+        if not isinstance(rules, list) or not all(rule.get("pattern") and rule.get("replies") for rule in rules):
+            raise ValueError("expected a list of rules with 'pattern' and 'replies'")
+    except (OSError, ValueError, AttributeError) as e:
+        logger.error(f"❌ Invalid fast-path rules ({e}); using the built-in rules")
+        return DEFAULT_RULES
+
+    valid = []
+    for rule in rules:
+        try:
+            re.compile(rule["pattern"])
+        except re.error as e:
+            logger.error(f"❌ Skipping fast-path rule {rule.get('name', rule['pattern'])!r}: bad pattern ({e})")
+            continue
+        valid.append(rule)
+    if not valid:
+        logger.error("❌ No valid fast-path rules; using the built-in rules")
+        return DEFAULT_RULES
+    return valid
+
+
+class FastPathResponder:
+    """
+    Answers trivial mentions (greetings, thanks, help requests) locally from a
+    rules table, without any Twitter lookup or LLM call.
+
+    Only plain mentions qualify: no links, no media and no quoted tweet. The
+    caller decides eligibility; match() only looks at the text. Each rule
+    rotates through its replies, so consecutive matches get different texts;
+    with few variants a text still comes round again, so the caller must make
+    repeats distinct before posting (Twitter rejects identical repeated posts).
+    """
+
+    def __init__(self, rules: Optional[List[dict]] = None):
+        self.rules = []
+        for rule in rules or DEFAULT_RULES:
+            self.rules.append({
+                **rule,
+                "name": rule.get("name", rule["pattern"]),
+                "regex": re.compile(rule["pattern"], re.IGNORECASE)
+            })
+        self.stats = {"checked": 0, "llm_calls_avoided": 0, "by_rule": {rule["name"]: 0 for rule in self.rules}}
+        self._next_reply = {rule["name"]: 0 for rule in self.rules}
+        self._match_secs = 0.0
+
+    def match(self, text: str, is_reply: bool = False) -> Optional[str]:
+        """Canned reply for a trivial mention, or None if it needs the full pipeline"""
+        start = time.perf_counter()
+        self.stats["checked"] += 1
+        text = re.sub(r"\s+", " ", text or "").strip()
+        reply = None
+        for rule in self.rules:
+            if is_reply and not rule.get("in_replies", False):
+                continue
+            if rule["regex"].fullmatch(text):
+                reply = rule["replies"][self._next_reply[rule["name"]] % len(rule["replies"])]
+                self._next_reply[rule["name"]] += 1
+                self.stats["llm_calls_avoided"] += 1
+                self.stats["by_rule"][rule["name"]] += 1
+                logger.info(f"⚡ Fast-path reply ({rule['name']})")
+                break
+        self._match_secs += time.perf_counter() - start
+        return reply
+
+    def get_stats(self) -> dict:
+        checked = self.stats["checked"]
+        return {
+            **self.stats,
+            "by_rule": dict(self.stats["by_rule"]),
+            "avg_match_us": round(self._match_secs / checked * 1e6, 1) if checked else 0.0
+        }
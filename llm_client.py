@@ -0,0 +1,295 @@
+import re
+import json
+import time
+import codecs
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Keys a streamed JSON event may carry its text delta under
+STREAM_TEXT_KEYS = ("response", "delta", "text", "content", "token")
+SENTENCE_END = re.compile(r"[.!?…](?=[\s\"')\]]|$)")
+
+def trim_to_sentence(text: str, max_chars: int, min_fraction: float = 0.5) -> str:
+    """
+    Shorten text to at most max_chars, preferring the last complete sentence.
+    Falls back to a word boundary plus "..." when no sentence ends in the last
+    half of the allowed length.
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return text
+
+    head = text[:max_chars]
+    ends = [m.end() for m in SENTENCE_END.finditer(head)]
+    if ends and ends[-1] >= max_chars * min_fraction:
+        return head[:ends[-1]].strip()
+
+    head = text[:max_chars - 3]
+    if " " in head:
+        head = head.rsplit(" ", 1)[0]
+    return head.rstrip(" ,;:-") + "..."
+
+def prompt_cache_usage(body: Any) -> Optional[Tuple[int, int]]:
+    """
+    (prompt tokens, prompt tokens served from the backend's prefix cache) when
+    the response reports them: OpenAI-style usage.prompt_tokens_details,
+    Anthropic-style usage.cache_read_input_tokens or llama.cpp's tokens_cached
+    """
+    if not isinstance(body, dict):
+        return None
+    usage = body.get("usage")
+    if isinstance(usage, dict):
+        details = usage.get("prompt_tokens_details") or {}
+        if "prompt_tokens" in usage and "cached_tokens" in details:
+            return int(usage["prompt_tokens"]), int(details["cached_tokens"] or 0)
+        if "cache_read_input_tokens" in usage:
+            cached = int(usage["cache_read_input_tokens"] or 0)
+            uncached = int(usage.get("input_tokens") or 0) + int(usage.get("cache_creation_input_tokens") or 0)
+            return uncached + cached, cached
+    if "tokens_cached" in body and "tokens_evaluated" in body:
+        return int(body["tokens_evaluated"]), int(body["tokens_cached"])
+    return None
+
+class LLMClient:
+    """Shared async client for the LLM query API with keep-alive connection pooling"""
+
+    def __init__(self, api_url: str, timeout: int = 100, pool_size: int = 10, keepalive_timeout: int = 60,
+                 stream_param: Optional[str] = "stream"):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.stream_param = stream_param  # query flag asking the API to stream (None to send none)
+        self.session = None
+        self.connector = None
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "total_latency_secs": 0.0,
+            "streams": 0,
+            "stream_cutoffs": 0,
+            "cache_reports": 0,
+            "prompt_tokens": 0,
+            "cached_prompt_tokens": 0
+        }
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Count new versus reused pooled connections"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_connection_create_end(session, ctx, params):
+            self.stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.stats["connections_reused"] += 1
+
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get or create the pooled aiohttp session"""
+        if not self.session or self.session.closed:
+            self.connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(
+                connector=self.connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=10),
+                trace_configs=[self._build_trace_config()],
+                headers={
+                    'User-Agent': 'TwitterBot/1.0',
+                    'Accept': 'application/json'
+                }
+            )
+        return self.session
+
+    async def query(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Send a GET query to the LLM API
+
+        Returns:
+            Parsed JSON body on HTTP 200, otherwise None
+        Raises:
+            asyncio.TimeoutError when the request exceeds the configured timeout
+        """
+        session = await self._get_session()
+        query_params = self._query_params(params)
+
+        self.stats["requests"] += 1
+        start = time.perf_counter()
+        try:
+            async with session.get(self.api_url, params=query_params) as response:
+                if response.status == 200:
+                    body = await response.json(content_type=None)
+                    self._record_cache_usage(body)
+                    return body
+                self.stats["errors"] += 1
+                logger.error(f"❌ LLM API returned status {response.status}")
+                return None
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["total_latency_secs"] += time.perf_counter() - start
+
+    @staticmethod
+    def _query_params(params: Dict[str, Any]) -> Dict[str, Any]:
+        # aiohttp rejects bool query values; send them the way requests did ("True"/"False")
+        return {k: (str(v) if isinstance(v, bool) else v) for k, v in params.items()}
+
+    async def query_stream(self, params: Dict[str, Any], max_chars: int) -> Optional[Dict[str, Any]]:
+        """
+        Streaming variant of query() for answers that will be cut to max_chars.
+
+        Reads an SSE (text/event-stream) or chunked plain-text body and stops as
+        soon as more than max_chars characters have arrived, closing the
+        connection instead of waiting for the rest. The text is trimmed at a
+        sentence boundary. A plain JSON reply (API without streaming) is
+        read whole and trimmed the same way.
+
+        Returns:
+            {'response': text, 'streamed': True, 'cut_off': bool}, the JSON body, or None on error
+        Raises:
+            asyncio.TimeoutError when the request exceeds the configured timeout
+        """
+        session = await self._get_session()
+        stream_params = {**params, self.stream_param: True} if self.stream_param else params
+        headers = {"Accept": "text/event-stream, text/plain;q=0.9, application/json;q=0.8"}
+
+        self.stats["requests"] += 1
+        self.stats["streams"] += 1
+        start = time.perf_counter()
+        try:
+            async with session.get(self.api_url, params=self._query_params(stream_params), headers=headers) as response:
+                if response.status != 200:
+                    self.stats["errors"] += 1
+                    logger.error(f"❌ LLM API returned status {response.status}")
+                    return None
+
+                content_type = response.headers.get("Content-Type", "")
+                if "json" in content_type:
+                    result = await response.json(content_type=None)
+                    self._record_cache_usage(result)
+                    if isinstance(result, dict) and isinstance(result.get("response"), str):
+                        result["response"] = trim_to_sentence(result["response"], max_chars)
+                    return result
+
+                if "text/event-stream" in content_type:
+                    pieces = self._read_sse(response)
+                else:
+                    pieces = self._read_text(response)
+
+                parts, length, cut_off = [], 0, False
+                async for piece in pieces:
+                    parts.append(piece)
+                    length += len(piece)
+                    if length > max_chars:
+                        cut_off = True
+                        break
+                await pieces.aclose()
+
+                if cut_off:
+                    # Drop the connection rather than draining an answer we will not use
+                    self.stats["stream_cutoffs"] += 1
+                    response.close()
+                return {"response": trim_to_sentence("".join(parts), max_chars), "streamed": True, "cut_off": cut_off}
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["total_latency_secs"] += time.perf_counter() - start
+
+    def _record_cache_usage(self, body: Any):
+        usage = prompt_cache_usage(body)
+        if usage:
+            self.stats["cache_reports"] += 1
+            self.stats["prompt_tokens"] += usage[0]
+            self.stats["cached_prompt_tokens"] += usage[1]
+
+    def _event_text(self, data: str) -> str:
+        """Text carried by one SSE event: a JSON object/string delta or raw text"""
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            return data
+        if isinstance(payload, str):
+            return payload
+        if isinstance(payload, dict):
+            self._record_cache_usage(payload)  # usually on the first or final event
+            for key in STREAM_TEXT_KEYS:
+                if isinstance(payload.get(key), str):
+                    return payload[key]
+        return ""
+
+    async def _read_sse(self, response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+        """Yield the text of each server-sent event until [DONE] or end of stream"""
+        data_lines = []
+        async for raw_line in response.content:
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            if line.startswith("data:"):
+                value = line[5:]
+                data_lines.append(value[1:] if value.startswith(" ") else value)
+                continue
+            if line or not data_lines:
+                continue  # comments, other fields, or a blank line with no event
+            data = "\n".join(data_lines)
+            data_lines = []
+            if data.strip() == "[DONE]":
+                return
+            yield self._event_text(data)
+        if data_lines and "\n".join(data_lines).strip() != "[DONE]":
+            yield self._event_text("\n".join(data_lines))
+
+    @staticmethod
+    async def _read_text(response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+        """Yield a chunked plain-text body as it arrives (UTF-8 safe across chunks)"""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        async for chunk in response.content.iter_any():
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def get_stats(self) -> dict:
+        """Request counters plus connection pool usage"""
+        requests_made = self.stats["requests"]
+        pool = {"limit": self.pool_size, "in_use": 0, "idle": 0}
+        if self.connector and not self.connector.closed:
+            # aiohttp has no public accessor for pool occupancy
+            pool["in_use"] = len(getattr(self.connector, "_acquired", ()))
+            pool["idle"] = sum(len(conns) for conns in getattr(self.connector, "_conns", {}).values())
+        return {
+            **{k: v for k, v in self.stats.items() if k != "total_latency_secs"},
+            "average_latency_secs": round(self.stats["total_latency_secs"] / requests_made, 2) if requests_made else 0.0,
+            # Share of prompt tokens the backend served from its prefix cache (None until it reports usage)
+            "prompt_cache_hit_rate": (round(self.stats["cached_prompt_tokens"] / self.stats["prompt_tokens"], 3)
+                                      if self.stats["prompt_tokens"] else None),
+            "pool": pool
+        }
+
+    async def close(self):
+        """Close the pooled session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+            self.session = None
+            logger.debug("🔒 Closed LLM client session")
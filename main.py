@@ -187,6 +187,7 @@ import hashlib
 import hmac
 import base64
 from urllib.parse import quote
+from rate_limits import RateLimitBudget, endpoint_for_route
 
 # Load env
 load_dotenv()
@@ -221,10 +222,11 @@ processed_tweets: Dict[str, float] = {}
 processed_dms: Dict[str, float] = {}
 MESSAGE_EXPIRY = 3600  # 1 hour
 
-# Rate limiting
+# Rate limiting (per user, on top of the per-endpoint Twitter budget)
 rate_limits: Dict[str, List[float]] = {}
 RATE_LIMIT_WINDOW = 900  # 15 minutes
 RATE_LIMIT_REQUESTS = 300  # requests per window
+rate_budget = RateLimitBudget()
 
 # FastAPI setup
 app = FastAPI(title="Twitter Chatbot API")
@@ -279,6 +281,36 @@ def check_rate_limit(user_id: str) -> bool:
     rate_limits[user_id] = user_requests
     return True
 
+def reserve_twitter_call(method: str, url: str) -> bool:
+    """Reserve capacity for a Twitter API call on the shared endpoint budget."""
+    endpoint = endpoint_for_route(method, url)
+    if endpoint and not rate_budget.try_reserve(endpoint):
+        logger.warning(f"Twitter {endpoint} budget exhausted, retry in {rate_budget.wait_time(endpoint):.0f}s")
+        return False
+    return True
+
+async def post_to_twitter(url: str, headers: Dict[str, str], payload: Dict[str, Any]) -> httpx.Response:
+    """POST a reserved Twitter call; the reservation is returned if the request never reached Twitter."""
+    try:
+        async with httpx.AsyncClient(timeout=30) as client:
+            response = await client.post(url, headers=headers, json=payload)
+    except httpx.RequestError as e:
+        if not isinstance(e, httpx.ReadTimeout):
+            endpoint = endpoint_for_route('POST', url)
+            if endpoint:
+                rate_budget.release(endpoint)
+        raise
+    record_twitter_response('POST', url, response)
+    return response
+
+def record_twitter_response(method: str, url: str, response: httpx.Response):
+    """Feed a Twitter response's rate-limit headers back into the shared budget."""
+    endpoint = endpoint_for_route(method, url)
+    if response.status_code == 429:
+        rate_budget.record_throttled(endpoint, response.headers)
+    else:
+        rate_budget.update_from_headers(endpoint, response.headers)
+
 def create_oauth_signature(method: str, url: str, params: Dict[str, str]) -> str:
     """Create OAuth 1.0a signature for Twitter API."""
     # OAuth parameters
@@ -337,6 +369,8 @@ async def send_tweet_reply(tweet_id: str, reply_text: str, user_id: str) -> bool
             reply_text = reply_text[:MAX_REPLY_LENGTH-3] + "..."
         
         url = f"{TWITTER_API_BASE}/tweets"
+        if not reserve_twitter_call('POST', url):
+            return False
         
         # For API v2, we need OAuth 1.0a
         oauth_params = create_oauth_signature('POST', url, {})
@@ -353,8 +387,7 @@ async def send_tweet_reply(tweet_id: str, reply_text: str, user_id: str) -> bool
             }
         }
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(url, headers=headers, json=payload)
+        response = await post_to_twitter(url, headers, payload)
         
         if response.status_code == 201:
             logger.info(f"Successfully replied to tweet {tweet_id}")
@@ -379,6 +412,8 @@ async def send_direct_message(user_id: str, message_text: str) -> bool:
             message_text = message_text[:9997] + "..."
         
         url = f"{TWITTER_API_V1_BASE}/direct_messages/events/new.json"
+        if not reserve_twitter_call('POST', url):
+            return False
         
         oauth_params = create_oauth_signature('POST', url, {})
         
@@ -401,8 +436,7 @@ async def send_direct_message(user_id: str, message_text: str) -> bool:
             }
         }
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(url, headers=headers, json=payload)
+        response = await post_to_twitter(url, headers, payload)
         
         if response.status_code == 200:
             logger.info(f"Successfully sent DM to user {user_id}")
@@ -621,6 +655,7 @@ async def status():
         "processed_tweets": len(processed_tweets),
         "processed_dms": len(processed_dms),
         "active_rate_limits": len([k for k, v in rate_limits.items() if v]),
+        "twitter_rate_budget": rate_budget.get_stats(),
         "server_time": datetime.now().isoformat(),
         "config": {
             "bot_username": BOT_USERNAME,
@@ -641,6 +676,8 @@ async def send_tweet(request: Request):
             return {"error": "Text is required"}
         
         url = f"{TWITTER_API_BASE}/tweets"
+        if not reserve_twitter_call('POST', url):
+            return {"error": "Twitter rate limit budget exhausted"}
         oauth_params = create_oauth_signature('POST', url, {})
         
         headers = {
@@ -650,8 +687,7 @@ async def send_tweet(request: Request):
         
         payload = {"text": text}
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(url, headers=headers, json=payload)
+        response = await post_to_twitter(url, headers, payload)
         
         if response.status_code == 201:
             return {"success": True, "tweet": response.json()}
@@ -6,20 +6,136 @@ import logging
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 import uuid
-from urllib.parse import urlparse
+import time
+from urllib.parse import urlparse, urlunparse
 import tempfile
 
+from cache_utils import TTLCache
+from state_store import open_state_db
+
 logger = logging.getLogger(__name__)
 
+# Twitter media hosts serve the same file regardless of query string (format/name/tag)
+MEDIA_HOSTS = {"pbs.twimg.com", "video.twimg.com"}
+
+def normalize_media_url(url: str) -> str:
+    """Canonical form of a media URL for cache keys"""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    query = "" if host in MEDIA_HOSTS else parsed.query
+    return urlunparse(("https", host, parsed.path, "", query, ""))
+
+class MediaDescriptionCache:
+    """Two-tier (memory LRU + sqlite on disk) cache of media descriptions keyed by media_key and URL"""
+    
+    def __init__(self, db_path: Path, ttl: float = 7 * 24 * 3600, memory_size: int = 512, max_entries: int = 5000,
+                 trim_every: int = 100):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.trim_every = trim_every  # puts between disk-tier trims
+        self._puts_since_trim = 0
+        self.memory = TTLCache(maxsize=memory_size, ttl=ttl)
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "trimmed": 0}
+        self.db = open_state_db(str(db_path))
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS media_descriptions ("
+            "key TEXT PRIMARY KEY, description TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_media_created ON media_descriptions(created_at)")
+        self.db.commit()
+        self._trim(time.time())
+    
+    @staticmethod
+    def keys_for(media_key: Optional[str], media_url: Optional[str]) -> List[str]:
+        keys = []
+        if media_key:
+            keys.append(f"media:{media_key}")
+        if media_url:
+            keys.append(f"url:{normalize_media_url(media_url)}")
+        return keys
+    
+    def get(self, keys: List[str]) -> Optional[str]:
+        """Return the first cached description for any of the keys"""
+        for key in keys:
+            description = self.memory.get(key)
+            if description:
+                self.stats["memory_hits"] += 1
+                return description
+        
+        for key in keys:
+            row = self.db.execute(
+                "SELECT description, created_at FROM media_descriptions WHERE key = ?", (key,)
+            ).fetchone()
+            if row and time.time() - row[1] < self.ttl:
+                self.stats["disk_hits"] += 1
+                for k in keys:
+                    self.memory.set(k, row[0])
+                return row[0]
+        
+        self.stats["misses"] += 1
+        return None
+    
+    def put(self, keys: List[str], description: str):
+        """Store a description under every key (the disk tier is trimmed every trim_every puts)"""
+        now = time.time()
+        for key in keys:
+            self.memory.set(key, description)
+        self.db.executemany(
+            "INSERT OR REPLACE INTO media_descriptions (key, description, created_at) VALUES (?, ?, ?)",
+            [(key, description, now) for key in keys]
+        )
+        self.db.commit()
+        self.stats["stores"] += 1
+        self._puts_since_trim += 1
+        if self._puts_since_trim >= self.trim_every:
+            self._trim(now)
+    
+    def _trim(self, now: float):
+        """Drop expired rows, then the oldest ones while the disk tier is over max_entries"""
+        self._puts_since_trim = 0
+        trimmed = self.db.execute("DELETE FROM media_descriptions WHERE created_at < ?", (now - self.ttl,)).rowcount
+        count = self.db.execute("SELECT COUNT(*) FROM media_descriptions").fetchone()[0]
+        if count > self.max_entries:
+            trimmed += self.db.execute(
+                "DELETE FROM media_descriptions WHERE key IN "
+                "(SELECT key FROM media_descriptions ORDER BY created_at LIMIT ?)",
+                (count - self.max_entries,)
+            ).rowcount
+        self.db.commit()
+        self.stats["trimmed"] += trimmed
+    
+    def get_stats(self) -> dict:
+        disk_entries = self.db.execute("SELECT COUNT(*) FROM media_descriptions").fetchone()[0]
+        return {**self.stats, "memory_entries": len(self.memory), "disk_entries": disk_entries}
+    
+    def close(self):
+        self.db.close()
+
 class MediaProcessor:
     """Enhanced utility class to process Twitter media files via URL-based API"""
     
-    def __init__(self, temp_dir: str = None):
+    def __init__(self, temp_dir: str = None, max_concurrency: int = 4,
+                 item_timeout: float = 60, overall_timeout: float = 120,
+                 cache_ttl: float = 7 * 24 * 3600, cache_memory_size: int = 512,
+                 cache_max_entries: int = 5000):
         self.temp_dir = Path(temp_dir) if temp_dir else Path(tempfile.gettempdir()) / "twitter_media"
         self.temp_dir.mkdir(exist_ok=True)
         self.session = None
         self.processed_files = []  # Track files for cleanup (kept for compatibility)
         
+        # Concurrency and deadlines for media API calls
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.item_timeout = item_timeout
+        self.overall_timeout = overall_timeout
+        
+        # Descriptions survive restarts so repeated root-tweet media is never re-sent
+        self.description_cache = MediaDescriptionCache(
+            self.temp_dir / "media_descriptions.sqlite3",
+            ttl=cache_ttl,
+            memory_size=cache_memory_size,
+            max_entries=cache_max_entries
+        )
+        
     async def _get_session(self):
         """Get or create aiohttp session"""
         if not self.session or self.session.closed:
@@ -49,38 +165,79 @@ class MediaProcessor:
         """
         if not media_objects or not api_url:
             return ""
-            
-        all_descriptions = []
         
-        for media in media_objects:
-            try:
-                # Get the appropriate URL based on media type
-                media_url = await self._get_media_url(media)
-                
-                if not media_url:
-                    logger.warning(f"⚠️ No URL found for media {media.media_key}")
-                    continue
-                
-                logger.info(f"🖼️ Processing {media.type} via API: {media.media_key}")
-                
-                # Process media via URL-based API
-                description = await self._process_media_url(media_url, api_url)
-                
-                if description:
-                    all_descriptions.append(description)
-                    logger.info(f"✅ Processed {media.type}: {len(description)} chars")
-                else:
-                    logger.warning(f"⚠️ No description returned for {media.media_key}")
-                    
-            except Exception as e:
-                logger.error(f"❌ Error processing media {getattr(media, 'media_key', 'unknown')}: {e}")
-                continue
+        outcome = await self.describe_media(media_objects, api_url)
+        all_descriptions = outcome['descriptions']
         
         # Combine all descriptions
         combined_description = " | ".join(all_descriptions) if all_descriptions else ""
         logger.info(f"📝 Total media descriptions: {len(combined_description)} chars from {len(all_descriptions)} files")
         return combined_description
     
+    async def describe_media(self, media_objects: List[Any], api_url: str) -> Dict:
+        """
+        Describe media objects concurrently (bounded by the processor semaphore)
+        
+        Each item gets item_timeout seconds and the whole batch overall_timeout
+        seconds; anything unfinished at the deadline is cancelled.
+        
+        Returns:
+            Dict with 'descriptions' (in the original media order) and 'failures'
+            (one {'media_key', 'error'} entry per media item that produced nothing)
+        """
+        tasks = [asyncio.create_task(self._describe_one(media, api_url)) for media in media_objects]
+        if not tasks:
+            return {'descriptions': [], 'failures': []}
+        
+        done, pending = await asyncio.wait(tasks, timeout=self.overall_timeout)
+        for task in pending:
+            task.cancel()
+        # Let the cancelled tasks unwind (closing their requests) before reporting
+        await asyncio.gather(*pending, return_exceptions=True)
+        
+        descriptions = []
+        failures = []
+        for media, task in zip(media_objects, tasks):
+            media_key = getattr(media, 'media_key', 'unknown')
+            if task in pending:
+                error = f"overall deadline of {self.overall_timeout}s exceeded"
+            elif task.exception() is not None:
+                exc = task.exception()
+                error = f"timed out after {self.item_timeout}s" if isinstance(exc, asyncio.TimeoutError) else str(exc)
+            else:
+                descriptions.append(task.result())
+                continue
+            failures.append({'media_key': media_key, 'error': error})
+            logger.warning(f"⚠️ Media {media_key} failed: {error}")
+        
+        return {'descriptions': descriptions, 'failures': failures}
+    
+    async def _describe_one(self, media, api_url: str) -> str:
+        """Describe one media object; raises if it yields no description"""
+        # Get the appropriate URL based on media type
+        media_url = await self._get_media_url(media)
+        cache_keys = MediaDescriptionCache.keys_for(getattr(media, 'media_key', None), media_url)
+        
+        cached = self.description_cache.get(cache_keys)
+        if cached:
+            logger.info(f"♻️ Using cached description for {media.media_key}")
+            return cached
+        
+        if not media_url:
+            raise ValueError("no URL found for media")
+        
+        async with self.semaphore:
+            logger.info(f"🖼️ Processing {media.type} via API: {media.media_key}")
+            
+            # Process media via URL-based API
+            description = await asyncio.wait_for(self._process_media_url(media_url, api_url), self.item_timeout)
+            if not description:
+                raise ValueError("no description returned")
+        
+        logger.info(f"✅ Processed {media.type}: {len(description)} chars")
+        self.description_cache.put(cache_keys, description)
+        return description
+    
     async def _get_media_url(self, media) -> Optional[str]:
         """Extract download URL from media object based on type"""
         try:
@@ -163,6 +320,10 @@ class MediaProcessor:
                 
         return ""
     
+    def get_cache_stats(self) -> dict:
+        """Media description cache counters"""
+        return self.description_cache.get_stats()
+    
     def cleanup_file(self, file_path: str):
         """Delete temporary file (kept for compatibility)"""
         try:
@@ -211,10 +372,12 @@ class MediaProcessor:
         try:
             # Process media via URL-based API
             if api_url and media_objects:
-                description = await self.process_media_from_tweet(media_objects, tweet_id, api_url)
-                result['combined_description'] = description
-                if description:
-                    result['descriptions'] = description.split(' | ')
+                outcome = await self.describe_media(media_objects, api_url)
+                result['descriptions'] = outcome['descriptions']
+                result['combined_description'] = " | ".join(outcome['descriptions'])
+                result['errors'].extend(
+                    f"{failure['media_key']}: {failure['error']}" for failure in outcome['failures']
+                )
             
             # Generate basic media info without downloading
             for media in media_objects:
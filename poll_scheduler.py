@@ -0,0 +1,93 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class PollScheduler:
+    """
+    Fixed-rate poll scheduler with an adaptive interval.
+
+    Polls start every `interval` seconds measured from the start of the previous
+    poll, so processing time does not push the schedule back. The interval
+    shrinks towards min_interval while mentions are arriving (aiming for about
+    target_per_poll mentions per poll), stretches towards max_interval while
+    idle, and never drops below what the remaining search quota allows before
+    the rate-limit window resets.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, target_per_poll: float = 3,
+                 idle_growth: float = 1.5, smoothing: float = 0.5, budget_reserve: int = 2):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_per_poll = target_per_poll
+        self.idle_growth = idle_growth
+        self.smoothing = smoothing
+        self.budget_reserve = budget_reserve
+        self.interval = max_interval
+        self.arrival_rate = 0.0  # mentions per second (EWMA)
+        self.last_start: Optional[float] = None
+        self.last_window = max_interval  # seconds covered by the latest poll
+        self.last_reason = "initial"
+
+    def mark_start(self) -> float:
+        """Record the start of a poll; returns seconds since the previous start"""
+        now = time.monotonic()
+        if self.last_start is not None:
+            self.last_window = max(now - self.last_start, 1.0)
+        self.last_start = now
+        return self.last_window
+
+    def record_poll(self, mentions_found: int, searches_used: int, rate_limit: Dict[str, int]) -> float:
+        """Update the arrival rate and pick the next interval"""
+        observed_rate = mentions_found / self.last_window
+        self.arrival_rate = self.smoothing * observed_rate + (1 - self.smoothing) * self.arrival_rate
+
+        if mentions_found:
+            candidate = self.target_per_poll / max(self.arrival_rate, 1e-6)
+            reason = f"busy ({self.arrival_rate * 60:.1f} mentions/min)"
+        else:
+            candidate = self.interval * self.idle_growth
+            reason = "idle"
+        candidate = min(max(candidate, self.min_interval), self.max_interval)
+
+        budget_floor = self._budget_floor(max(searches_used, 1), rate_limit)
+        if budget_floor > candidate:
+            candidate = budget_floor
+            reason = f"quota ({rate_limit.get('remaining')} searches left)"
+
+        self.interval = candidate
+        self.last_reason = reason
+        return self.interval
+
+    def _budget_floor(self, searches_per_poll: int, rate_limit: Dict[str, int]) -> float:
+        """Shortest interval that will not exhaust the search window before it resets"""
+        remaining = rate_limit.get("remaining")
+        reset = rate_limit.get("reset")
+        if remaining is None or not reset:
+            return 0.0
+
+        seconds_to_reset = max(reset - time.time(), 0.0)
+        usable = remaining - self.budget_reserve
+        if usable < searches_per_poll:
+            return seconds_to_reset + 1
+        polls_left = usable / searches_per_poll
+        return seconds_to_reset / polls_left
+
+    def seconds_until_next(self) -> float:
+        if self.last_start is None:
+            return 0.0
+        return max(0.0, self.last_start + self.interval - time.monotonic())
+
+    async def wait_next(self):
+        """Sleep until the next fixed-rate slot (immediately if the last poll overran)"""
+        await asyncio.sleep(self.seconds_until_next())
+
+    def get_stats(self) -> dict:
+        return {
+            "interval_secs": round(self.interval, 1),
+            "reason": self.last_reason,
+            "arrival_rate_per_min": round(self.arrival_rate * 60, 2),
+            "next_poll_in_secs": round(self.seconds_until_next(), 1)
+        }
@@ -0,0 +1,271 @@
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Conservative (requests, window seconds) per endpoint, used until a response
+# reports the real limit in its x-rate-limit-* headers
+DEFAULT_LIMITS: Dict[str, Tuple[int, float]] = {
+    "search": (60, 900),
+    "tweet_lookup": (15, 900),
+    "user_lookup": (100, 24 * 3600),
+    "create_tweet": (100, 24 * 3600),
+    "dm": (15, 900),
+    "dm_lookup": (15, 900),
+    "follow": (5, 900),
+}
+UNKNOWN_ENDPOINT_LIMIT = (15, 900)
+
+# (method, path prefix) -> endpoint; first match wins, so specific prefixes come first
+ROUTE_ENDPOINTS = [
+    ("GET", "/2/tweets/search", "search"),
+    ("GET", "/2/tweets", "tweet_lookup"),
+    ("GET", "/2/users", "user_lookup"),
+    ("POST", "/2/tweets", "create_tweet"),
+    ("POST", "/2/dm_conversations", "dm"),
+    ("POST", "/1.1/direct_messages", "dm"),
+    ("GET", "/1.1/direct_messages", "dm_lookup"),
+    ("POST", "/2/users", "follow"),
+]
+
+def endpoint_for_route(method: str, route: str) -> Optional[str]:
+    """Budget endpoint for an API route or full URL (None if it is not tracked)"""
+    path = urlparse(route).path or route
+    for route_method, prefix, endpoint in ROUTE_ENDPOINTS:
+        if method.upper() == route_method and path.startswith(prefix):
+            return endpoint
+    return None
+
+def parse_rate_limit_headers(headers) -> Optional[Dict[str, int]]:
+    """x-rate-limit-* headers as ints (None when the response carries none)"""
+    if headers is None:
+        return None
+    try:
+        remaining = headers.get("x-rate-limit-remaining")
+        if remaining is None:
+            return None
+        limit = headers.get("x-rate-limit-limit")
+        reset = headers.get("x-rate-limit-reset")
+        return {
+            "limit": int(limit) if limit is not None else None,
+            "remaining": int(remaining),
+            "reset": int(reset) if reset is not None else None
+        }
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitExhausted(Exception):
+    """No budget left for an endpoint within the caller's wait limit"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"rate-limit budget for {endpoint} exhausted, retry in {retry_after:.0f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Request budget for one endpoint.
+
+    Until headers are seen it refills continuously at capacity/window. Once a
+    response reports x-rate-limit-*, it follows the server's fixed window
+    instead: the reported remaining count until the reset time, then full.
+    """
+
+    def __init__(self, capacity: int, window_secs: float):
+        self.capacity = capacity
+        self.window_secs = window_secs
+        self.tokens = float(capacity)
+        self.updated_at = time.time()
+        self.reset_at: Optional[float] = None
+        self.learned = False
+        self.reserved = 0
+        self.denied = 0
+        self.throttled = 0
+        self._recent = deque(maxlen=256)  # reservation times, for the consumption rate
+
+    def _refill(self, now: float):
+        if self.reset_at is not None:
+            if now < self.reset_at:
+                return
+            self.tokens = float(self.capacity)
+            self.reset_at = None
+        elif now > self.updated_at:
+            self.tokens = min(float(self.capacity),
+                              self.tokens + (now - self.updated_at) * self.capacity / self.window_secs)
+        self.updated_at = max(self.updated_at, now)
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def wait_time(self, n: int, now: float) -> float:
+        """Seconds until n tokens are available"""
+        self._refill(now)
+        if self.tokens >= n:
+            return 0.0
+        if n > self.capacity:
+            return math.inf
+        if self.reset_at is not None:
+            return self.reset_at - now
+        return (n - self.tokens) * self.window_secs / self.capacity
+
+    def take(self, n: int, now: float):
+        self.tokens -= n
+        self.reserved += n
+        self._recent.extend([now] * n)
+
+    def give_back(self, n: int):
+        self.tokens = min(float(self.capacity), self.tokens + n)
+        self.reserved -= n
+        for _ in range(min(n, len(self._recent))):
+            self._recent.pop()
+
+    def observe(self, limit: Optional[int], remaining: int, reset: Optional[int], now: float):
+        """Adopt the server's view of the current window"""
+        if limit:
+            self.capacity = limit
+        same_window = self.reset_at is not None and reset == self.reset_at
+        # Within the same window, keep the lower count: calls reserved after this
+        # request was sent are not reflected in its headers yet
+        self.tokens = float(min(self.tokens, remaining) if same_window else remaining)
+        self.reset_at = reset if reset and reset > now else None
+        self.updated_at = now
+        self.learned = True
+
+    def exhausts_in(self, now: float) -> Optional[float]:
+        """Seconds until the budget runs out at the recent reservation rate (None if it will not)"""
+        self._refill(now)
+        recent = [t for t in self._recent if now - t <= self.window_secs]
+        if len(recent) < 2:
+            return None
+        rate = len(recent) / max(now - recent[0], 1.0)
+        refill_rate = 0.0 if self.reset_at is not None else self.capacity / self.window_secs
+        if rate <= refill_rate:
+            return None
+        seconds = max(self.tokens, 0.0) / (rate - refill_rate)
+        if self.reset_at is not None and now + seconds >= self.reset_at:
+            return None
+        return seconds
+
+
+class RateLimitBudget:
+    """
+    Per-endpoint token buckets shared by every Twitter call site in a process.
+
+    Callers reserve before a call (try_reserve / reserve) and feed response
+    headers back (update_from_headers / record_throttled) so each bucket tracks
+    the real limit. A reservation may name several buckets, e.g. an endpoint
+    plus an app-wide cap; it takes from all of them or from none.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()  # headers arrive on executor threads
+
+    def _bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            capacity, window_secs = self.limits.get(endpoint, UNKNOWN_ENDPOINT_LIMIT)
+            bucket = self._buckets[endpoint] = TokenBucket(capacity, window_secs)
+        return bucket
+
+    def configure(self, endpoint: str, capacity: int, window_secs: float):
+        """Set (or replace) the default limit of a bucket before it learns from headers"""
+        with self._lock:
+            self.limits[endpoint] = (capacity, window_secs)
+            self._buckets.pop(endpoint, None)
+
+    @staticmethod
+    def _names(endpoints: Union[str, Iterable[str]]) -> Tuple[str, ...]:
+        return (endpoints,) if isinstance(endpoints, str) else tuple(endpoints)
+
+    def try_reserve(self, endpoints: Union[str, Iterable[str]], n: int = 1) -> bool:
+        """Take n tokens from every named bucket if all of them have enough"""
+        now = time.time()
+        with self._lock:
+            buckets = [self._bucket(name) for name in self._names(endpoints)]
+            if any(bucket.wait_time(n, now) > 0 for bucket in buckets):
+                for bucket in buckets:
+                    bucket.denied += 1
+                return False
+            for bucket in buckets:
+                bucket.take(n, now)
+            return True
+
+    def wait_time(self, endpoints: Union[str, Iterable[str]], n: int = 1) -> float:
+        """Seconds until a reservation of n tokens could succeed"""
+        now = time.time()
+        with self._lock:
+            return max(self._bucket(name).wait_time(n, now) for name in self._names(endpoints))
+
+    async def reserve(self, endpoints: Union[str, Iterable[str]], n: int = 1,
+                      max_wait: Optional[float] = None):
+        """
+        Wait until n tokens can be taken from every named bucket, then take them.
+        Raises RateLimitExhausted if that would take longer than max_wait seconds.
+        """
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while not self.try_reserve(endpoints, n):
+            wait = self.wait_time(endpoints, n)
+            if deadline is not None and time.monotonic() + wait > deadline:
+                names = self._names(endpoints)
+                blocking = max(names, key=lambda name: self.wait_time(name, n))
+                raise RateLimitExhausted(blocking, wait)
+            await asyncio.sleep(max(wait, 0.05))
+
+    def release(self, endpoints: Union[str, Iterable[str]], n: int = 1):
+        """Return a reservation that was never used"""
+        with self._lock:
+            for name in self._names(endpoints):
+                self._bucket(name).give_back(n)
+
+    def update_from_headers(self, endpoint: Optional[str], headers) -> bool:
+        """Sync a bucket with a response's x-rate-limit-* headers; False if there were none"""
+        info = parse_rate_limit_headers(headers)
+        if not endpoint or info is None:
+            return False
+        with self._lock:
+            self._bucket(endpoint).observe(info["limit"], info["remaining"], info["reset"], time.time())
+        return True
+
+    def record_throttled(self, endpoint: Optional[str], headers=None):
+        """A 429: the window is spent until its reset, whatever we believed"""
+        if not endpoint:
+            return
+        now = time.time()
+        try:
+            reset = int(headers.get("x-rate-limit-reset"))
+        except (AttributeError, TypeError, ValueError):
+            reset = int(now + self.limits.get(endpoint, UNKNOWN_ENDPOINT_LIMIT)[1])
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            bucket.throttled += 1
+            bucket.observe(None, 0, reset, now)
+        logger.warning(f"⚠️ Twitter rate limit hit on {endpoint}; budget empty until reset")
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        stats = {}
+        with self._lock:
+            for name, bucket in sorted(self._buckets.items()):
+                exhausts_in = bucket.exhausts_in(now)
+                stats[name] = {
+                    "capacity": bucket.capacity,
+                    "available": int(bucket.available(now)),
+                    "learned_from_headers": bucket.learned,
+                    "resets_in_secs": round(bucket.reset_at - now) if bucket.reset_at else None,
+                    "exhausts_in_secs": round(exhausts_in) if exhausts_in is not None else None,
+                    "reserved": bucket.reserved,
+                    "denied": bucket.denied,
+                    "throttled": bucket.throttled
+                }
+        return stats
@@ -0,0 +1,254 @@
+import time
+import heapq
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+import tweepy
+
+from rate_limits import RateLimitBudget, RateLimitExhausted
+from state_store import open_state_db
+
+logger = logging.getLogger(__name__)
+
+# Budget bucket that spaces posts out, separate from the API's own create_tweet limit
+PACING_BUCKET = "reply_pacing"
+
+# Twitter's "Status is a duplicate" error code (v1.1); v2 only says so in the message
+DUPLICATE_STATUS_CODE = 187
+
+def is_duplicate_content(error: tweepy.HTTPException) -> bool:
+    """Whether Twitter rejected a post for repeating one of the account's recent tweets"""
+    return (DUPLICATE_STATUS_CODE in error.api_codes
+            or any("duplicate" in str(message).lower() for message in error.api_messages))
+
+def vary_reply_text(text: str, variant: int) -> str:
+    """The same reply made distinct from its earlier copies with a short counter"""
+    previous = f" ({variant})"
+    if variant > 1 and text.endswith(previous):
+        text = text[:-len(previous)]
+    return f"{text} ({variant + 1})"
+
+@dataclass
+class PendingReply:
+    in_reply_to_id: int
+    text: str
+    created_at: float  # when work on the reply started
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    last_error: str = ""
+    variants: int = 0  # times the text was varied after duplicate-content rejections
+
+class ReplyQueue:
+    """
+    Outbound queue of finished replies, posted by a single sender task.
+
+    enqueue() only records the reply (in memory and in the state database) and
+    returns, so mention processing never waits on posting. The sender paces
+    posts with a token bucket (burst, then one per `spacing` seconds), retries
+    rate limits and Twitter 5xx errors with backoff, and drops replies Twitter
+    rejects outright. The stored text is always what gets posted; answers are
+    never recomputed, but a reply rejected as duplicate content is varied with
+    `vary_text` and retried up to max_variants times. Replies still pending at
+    shutdown are resent on start.
+    """
+
+    def __init__(self, post: Callable[[str, int], Awaitable], budget: RateLimitBudget,
+                 db_path: Optional[str] = None, spacing: float = 5.0, burst: int = 1,
+                 max_attempts: int = 8, base_backoff: float = 15.0, max_backoff: float = 900.0,
+                 on_posted: Optional[Callable[[PendingReply, object], None]] = None,
+                 vary_text: Callable[[str, int], str] = vary_reply_text, max_variants: int = 3):
+        self.post = post
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.on_posted = on_posted
+        self.vary_text = vary_text
+        self.max_variants = max_variants
+        budget.configure(PACING_BUCKET, max(1, burst), max(1, burst) * spacing)
+
+        self._pending: Dict[int, PendingReply] = {}
+        self._schedule = []  # heap of (next_attempt_at, in_reply_to_id)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"enqueued": 0, "posted": 0, "retries": 0, "failed": 0, "duplicates": 0,
+                      "duplicate_content_varied": 0}
+
+        self.db = open_state_db(db_path) if db_path else None
+        if self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS pending_replies ("
+                "in_reply_to_id INTEGER PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL DEFAULT 0)"
+            )
+            self.db.commit()
+            self._load()
+
+    def _load(self):
+        rows = self.db.execute(
+            "SELECT in_reply_to_id, text, created_at, attempts, next_attempt_at FROM pending_replies"
+        )
+        for row in rows:
+            self._schedule_reply(PendingReply(*row))
+        if self._pending:
+            logger.info(f"📮 Reloaded {len(self._pending)} pending replies")
+
+    def _schedule_reply(self, reply: PendingReply):
+        self._pending[reply.in_reply_to_id] = reply
+        heapq.heappush(self._schedule, (reply.next_attempt_at, reply.in_reply_to_id))
+        self._wakeup.set()
+
+    def enqueue(self, text: str, in_reply_to_tweet_id, started_at: Optional[float] = None) -> bool:
+        """Queue a reply for posting; False if one for that tweet is already queued"""
+        tweet_id = int(in_reply_to_tweet_id)
+        if tweet_id in self._pending:
+            self.stats["duplicates"] += 1
+            return False
+
+        reply = PendingReply(in_reply_to_id=tweet_id, text=text, created_at=started_at or time.time())
+        if self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO pending_replies (in_reply_to_id, text, created_at) VALUES (?, ?, ?)",
+                (tweet_id, text, reply.created_at)
+            )
+            self.db.commit()
+        self.stats["enqueued"] += 1
+        self._schedule_reply(reply)
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._sender())
+
+    async def stop(self):
+        """Stop sending; unsent replies stay in the database for the next start"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def join(self, poll_interval: float = 0.05):
+        """Wait until nothing is pending (posted or given up)"""
+        while self._pending:
+            await asyncio.sleep(poll_interval)
+
+    async def _next_due(self) -> PendingReply:
+        while True:
+            self._wakeup.clear()
+            if self._schedule:
+                due_at, tweet_id = self._schedule[0]
+                reply = self._pending.get(tweet_id)
+                if reply is None or reply.next_attempt_at != due_at:
+                    heapq.heappop(self._schedule)  # stale entry
+                    continue
+                delay = due_at - time.time()
+                if delay <= 0:
+                    heapq.heappop(self._schedule)
+                    return reply
+            else:
+                delay = None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _sender(self):
+        while True:
+            reply = await self._next_due()
+            try:
+                await self.budget.reserve(PACING_BUCKET)
+                await self._send(reply)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Reply sender error for {reply.in_reply_to_id}: {e}")
+                self._retry(reply, self._backoff(reply.attempts), str(e))
+
+    async def _send(self, reply: PendingReply):
+        reply.attempts += 1
+        try:
+            response = await self.post(reply.text, reply.in_reply_to_id)
+        except RateLimitExhausted as e:
+            reply.attempts -= 1  # never reached Twitter
+            self._retry(reply, e.retry_after, str(e))
+            return
+        except tweepy.TooManyRequests:
+            self._retry(reply, max(self.budget.wait_time("create_tweet"), self._backoff(reply.attempts)), "429")
+            return
+        except tweepy.TwitterServerError as e:
+            self._retry(reply, self._backoff(reply.attempts), f"{e.response.status_code} server error")
+            return
+        except tweepy.Forbidden as e:
+            if not is_duplicate_content(e) or reply.variants >= self.max_variants:
+                self._finish(reply, failed=True, error=f"{e.response.status_code}: {e}")
+                return
+            # Same text as a recent post of ours (e.g. a shared answer): vary it and resend
+            reply.attempts -= 1
+            reply.variants += 1
+            reply.text = self.vary_text(reply.text, reply.variants)
+            self.stats["duplicate_content_varied"] += 1
+            if self.db:
+                self.db.execute("UPDATE pending_replies SET text = ? WHERE in_reply_to_id = ?",
+                                (reply.text, reply.in_reply_to_id))
+                self.db.commit()
+            self._retry(reply, 0, "duplicate content")
+            return
+        except tweepy.HTTPException as e:
+            # 4xx other than 429 (duplicate, deleted tweet, forbidden): retrying won't help
+            self._finish(reply, failed=True, error=f"{e.response.status_code}: {e}")
+            return
+
+        self._finish(reply)
+        if self.on_posted:
+            try:
+                self.on_posted(reply, response)
+            except Exception as e:
+                logger.error(f"❌ on_posted callback failed for {reply.in_reply_to_id}: {e}")
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.base_backoff * 2 ** max(attempts - 1, 0))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _retry(self, reply: PendingReply, delay: float, error: str):
+        if reply.attempts >= self.max_attempts:
+            self._finish(reply, failed=True, error=f"gave up after {reply.attempts} attempts: {error}")
+            return
+        reply.next_attempt_at = time.time() + delay
+        reply.last_error = error
+        self.stats["retries"] += 1
+        logger.warning(f"🔁 Reply to {reply.in_reply_to_id} failed ({error}); retrying in {delay:.0f}s")
+        if self.db:
+            self.db.execute(
+                "UPDATE pending_replies SET attempts = ?, next_attempt_at = ? WHERE in_reply_to_id = ?",
+                (reply.attempts, reply.next_attempt_at, reply.in_reply_to_id)
+            )
+            self.db.commit()
+        heapq.heappush(self._schedule, (reply.next_attempt_at, reply.in_reply_to_id))
+
+    def _finish(self, reply: PendingReply, failed: bool = False, error: str = ""):
+        self._pending.pop(reply.in_reply_to_id, None)
+        if self.db:
+            self.db.execute("DELETE FROM pending_replies WHERE in_reply_to_id = ?", (reply.in_reply_to_id,))
+            self.db.commit()
+        if failed:
+            self.stats["failed"] += 1
+            logger.error(f"❌ Dropping reply to {reply.in_reply_to_id}: {error}")
+        else:
+            self.stats["posted"] += 1
+
+    def get_stats(self) -> dict:
+        oldest = min((r.created_at for r in self._pending.values()), default=None)
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "oldest_pending_secs": round(time.time() - oldest, 1) if oldest else None,
+            "persistent": self.db is not None
+        }
+
+    def close(self):
+        if self.db:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,296 @@
+import re
+import time
+import random
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Words that change nothing about what is being asked
+FILLER_WORDS = {
+    "pls", "plz", "please", "kindly", "hey", "hi", "hello", "bro", "sir", "team", "guys",
+    "this", "that", "the", "a", "an", "can", "you", "u", "ur", "me"
+}
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop links/@handles/punctuation/filler words and collapse whitespace"""
+    text = text.casefold()
+    text = re.sub(r"https?://\S+|@\w+", " ", text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    words = [word for word in text.split() if word not in FILLER_WORDS]
+    return " ".join(words)
+
+NUMBER_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?[a-z]*")
+
+def numeric_tokens(text: str) -> Tuple[str, ...]:
+    """
+    Numbers in a question (years, amounts, counts, with unit suffixes like 5k),
+    thousands separators removed. Questions that differ only in a number look
+    alike to shingles but ask different things, so these must match exactly.
+    """
+    text = re.sub(r"https?://\S+|@\w+", " ", text.casefold())
+    return tuple(sorted({token.replace(",", "") for token in NUMBER_PATTERN.findall(text)}))
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Character n-grams of the normalized text (the whole text if it is shorter)"""
+    text = normalize_question(text)
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures from num_perm universal hash functions (deterministic per seed)"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+
+    def signature(self, items: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "big") % MERSENNE_PRIME
+                  for item in items]
+        if not hashes:
+            return tuple([MERSENNE_PRIME] * self.num_perm)
+        return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self._perms)
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity: the share of matching signature slots"""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) whose candidate threshold (1/bands)**(1/rows) sits just below
+    `threshold`, so likely matches become candidates and the exact signature
+    comparison weeds out the rest.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold * 0.9:
+            best = (bands, rows)
+    return best
+
+
+class SimilarQuestionCache:
+    """
+    Reuses an earlier answer for a near-duplicate question about the same tweets.
+
+    A question matches only when its referenced tweet/media IDs are exactly the
+    ones of the earlier question, it contains exactly the same numbers, and the
+    MinHash-estimated Jaccard similarity of their text shingles is at least
+    `threshold`. Questions without referenced IDs are never shared. LSH banding
+    keeps lookups to a handful of candidates. Entries expire after ttl seconds and the least
+    recently used are dropped beyond maxsize.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, maxsize: int = 2000,
+                 ttl: float = 3600, shingle_size: int = 3, seed: int = 1):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm=num_perm, seed=seed)
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._index: Dict[Tuple, Set[int]] = {}
+        self._next_id = 0
+        self.stats = {"lookups": 0, "hits": 0, "candidates_checked": 0, "evictions": 0,
+                      "unscoped": 0}
+
+    @staticmethod
+    def _refs_key(ref_ids: Iterable) -> str:
+        return ",".join(sorted({str(ref_id) for ref_id in ref_ids if ref_id}))
+
+    @classmethod
+    def _scope_key(cls, text: str, ref_ids: Iterable) -> str:
+        """Questions are compared only within the same referenced IDs and numbers"""
+        refs_key = cls._refs_key(ref_ids)
+        return f"{refs_key}|{','.join(numeric_tokens(text))}" if refs_key else ""
+
+    def _band_keys(self, refs_key: str, signature: Tuple[int, ...]) -> List[Tuple]:
+        return [(refs_key, band, signature[band * self.rows:(band + 1) * self.rows])
+                for band in range(self.bands)]
+
+    def _drop(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for band_key in entry["bands"]:
+            bucket = self._index.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._index[band_key]
+
+    def _expire(self, now: float):
+        while self._entries:
+            oldest_id, oldest = next(iter(self._entries.items()))
+            if oldest["expires_at"] > now and len(self._entries) <= self.maxsize:
+                break
+            self._drop(oldest_id)
+            self.stats["evictions"] += 1
+
+    def lookup(self, text: str, ref_ids: Iterable = ()) -> Optional[Any]:
+        """Answer of the most similar earlier question (None if none clears the threshold)"""
+        now = time.monotonic()
+        self._expire(now)
+        self.stats["lookups"] += 1
+
+        refs_key = self._scope_key(text, ref_ids)
+        if not refs_key:
+            self.stats["unscoped"] += 1
+            return None
+        signature = self.hasher.signature(shingles(text, self.shingle_size))
+        candidates = set()
+        for band_key in self._band_keys(refs_key, signature):
+            candidates.update(self._index.get(band_key, ()))
+
+        best_id, best_score = None, 0.0
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            self.stats["candidates_checked"] += 1
+            if entry["refs"] != refs_key:
+                continue
+            score = MinHasher.similarity(signature, entry["signature"])
+            if score >= self.threshold and score > best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            return None
+        self.stats["hits"] += 1
+        self._entries.move_to_end(best_id)
+        logger.info(f"♻️ Similar question found (similarity {best_score:.2f})")
+        return self._entries[best_id]["answer"]
+
+    def add(self, text: str, ref_ids: Iterable, answer: Any):
+        refs_key = self._scope_key(text, ref_ids)
+        if not refs_key:
+            return
+        now = time.monotonic()
+        signature = self.hasher.signature(shingles(text, self.shingle_size))
+        band_keys = self._band_keys(refs_key, signature)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = {
+            "refs": refs_key,
+            "signature": signature,
+            "bands": band_keys,
+            "answer": answer,
+            "expires_at": now + self.ttl
+        }
+        for band_key in band_keys:
+            self._index.setdefault(band_key, set()).add(entry_id)
+        self._expire(now)
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows": self.rows,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0
+        }
+
+
+# Labeled questions for the benchmark: variants in one group ask the same thing
+BENCHMARK_GROUPS = [
+    ["is this fake?", "is this fake??", "Is this FAKE", "is this fake pls check", "is this fake or not?"],
+    ["is this real?", "is this real??", "Is this real or not", "hey is this real", "is this for real?"],
+    ["is this video edited?", "is this video edited??", "was this video edited", "is the video edited?"],
+    ["is this image ai generated?", "is this image AI generated??", "is this ai generated image", "ai generated image?"],
+    ["when was this photo taken?", "when was this photo taken??", "When was the photo taken", "when was this pic taken?"],
+    ["where was this video filmed?", "where was this video filmed", "where was the video filmed??", "where is this video filmed?"],
+    ["who is the man in this video?", "who is the man in the video", "who is this man in the video?", "who's the man in this video"],
+    ["did modi really say this?", "did modi really say this??", "did Modi actually say this?", "modi really said this?"],
+    ["what is the source of this claim?", "what is the source for this claim", "source of this claim?", "whats the source of this claim"],
+    ["is this news from today?", "is this news from today??", "is this news from today or old?", "this news is from today?"],
+    ["is this an old video?", "is this an old video??", "is this video old?", "old video or new?"],
+    ["how many people died in this accident?", "how many people died in the accident?", "how many died in this accident", "how many people died in accident??"],
+    ["fact check this pls", "fact check this please", "pls fact check this", "fact-check this"],
+    # Close wording, different question: these must not match the groups above
+    ["who is the woman in this video?", "who is the woman in the video", "who is this woman in the video?"],
+    ["how many people were injured in this accident?", "how many people were injured in the accident", "how many were injured in this accident?"],
+    ["is this video from india?", "is this video from india??", "is the video from India?"],
+    ["is this image real?", "is this image real??", "is the image real?"],
+    ["did rahul gandhi really say this?", "did Rahul Gandhi actually say this?", "rahul gandhi really said this?"],
+    # Same wording with a different number
+    ["is this video from 2019?", "is this video from 2019??", "is the video from 2019?"],
+    ["is this video from 2023?", "is this video from 2023??", "is the video from 2023?"],
+    ["did this accident kill 5000 people?", "did the accident kill 5000 people?", "did this accident kill 5,000 people??"],
+    ["did this accident kill 50000 people?", "did the accident kill 50000 people?", "did this accident kill 50,000 people??"],
+    ["does petrol cost 100 rupees now?", "does petrol cost 100 rupees now??", "petrol costs 100 rupees now?"],
+    ["does petrol cost 110 rupees now?", "does petrol cost 110 rupees now??", "petrol costs 110 rupees now?"],
+    # Same wording with a different person or place
+    ["is this video from mumbai?", "is this video from mumbai??", "is the video from Mumbai?"],
+    ["is this video from delhi?", "is this video from delhi??", "is the video from Delhi?"],
+    ["did amit shah really say this?", "did Amit Shah actually say this?", "amit shah really said this?"],
+    ["is this photo of shah rukh khan?", "is this photo of Shah Rukh Khan??", "is the photo of shah rukh khan?"],
+    ["is this photo of salman khan?", "is this photo of Salman Khan??", "is the photo of salman khan?"],
+]
+
+def evaluate_threshold(threshold: float, num_perm: int = 128) -> dict:
+    """
+    False-positive evaluation on BENCHMARK_GROUPS: the first question of each
+    group is answered, then every other variant is looked up. A hit on its own
+    group is a true positive; a hit on another group is a false positive. Each
+    variant is also looked up with different referenced IDs, which must never
+    hit. LSH false positives count hits whose exact shingle Jaccard is below
+    the threshold.
+    """
+    variants = [(group_id, question) for group_id, group in enumerate(BENCHMARK_GROUPS) for question in group[1:]]
+    cache = SimilarQuestionCache(threshold=threshold, num_perm=num_perm)
+    for group_id, group in enumerate(BENCHMARK_GROUPS):
+        cache.add(group[0], ["tweet:100"], group_id)
+
+    true_pos = false_pos = lsh_false_pos = wrong_refs_hits = 0
+    started = time.perf_counter()
+    for group_id, question in variants:
+        answer = cache.lookup(question, ["tweet:100"])
+        if answer is None:
+            continue
+        if answer == group_id:
+            true_pos += 1
+        else:
+            false_pos += 1
+        exact = jaccard(shingles(question), shingles(BENCHMARK_GROUPS[answer][0]))
+        if exact < threshold:
+            lsh_false_pos += 1
+    lookup_us = (time.perf_counter() - started) / len(variants) * 1e6
+
+    for _, question in variants:
+        if cache.lookup(question, ["tweet:200"]) is not None:
+            wrong_refs_hits += 1
+
+    return {
+        "bands": cache.bands, "rows": cache.rows, "variants": len(variants),
+        "recall": true_pos / len(variants), "false_pos": false_pos / len(variants),
+        "lsh_false_pos": lsh_false_pos / len(variants), "wrong_refs_hits": wrong_refs_hits,
+        "lookup_us": lookup_us
+    }
+
+def benchmark_false_positives(thresholds=(0.5, 0.6, 0.7, 0.8, 0.9), num_perm: int = 128):
+    print(f"{len(BENCHMARK_GROUPS)} groups, num_perm={num_perm}")
+    print("threshold  bands x rows  recall  false_pos  lsh_false_pos  wrong_refs_hits  lookup_us")
+    for threshold in thresholds:
+        result = evaluate_threshold(threshold, num_perm)
+        print(f"{threshold:9.2f}  {result['bands']:5d} x {result['rows']:<4d}  {result['recall']:6.2f}  "
+              f"{result['false_pos']:9.3f}  {result['lsh_false_pos']:13.3f}  "
+              f"{result['wrong_refs_hits']:15d}  {result['lookup_us']:9.0f}")
+
+
+if __name__ == "__main__":
+    benchmark_false_positives()
@@ -0,0 +1,195 @@
+import time
+import sqlite3
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Tweet IDs are snowflakes: milliseconds since the Twitter epoch, shifted left 22 bits
+TWITTER_EPOCH_MS = 1288834974657
+SNOWFLAKE_TIMESTAMP_SHIFT = 22
+
+def snowflake_from_datetime(dt: datetime) -> int:
+    """Smallest tweet ID that could have been created at `dt` (naive datetimes are UTC)"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    millis = int(dt.timestamp() * 1000)
+    return max(0, millis - TWITTER_EPOCH_MS) << SNOWFLAKE_TIMESTAMP_SHIFT
+
+def datetime_from_snowflake(tweet_id: int) -> datetime:
+    """Creation time encoded in a tweet ID"""
+    millis = (int(tweet_id) >> SNOWFLAKE_TIMESTAMP_SHIFT) + TWITTER_EPOCH_MS
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc)
+
+def open_state_db(db_path: str) -> sqlite3.Connection:
+    """Open the bot state database in WAL mode (readers never block the writer)"""
+    db = sqlite3.connect(db_path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+class ProcessedTweetStore:
+    """
+    Set of processed tweet IDs with O(1) membership checks, bounded memory and
+    durable persistence.
+
+    IDs are grouped into time buckets so eviction drops whole buckets, oldest
+    first. Buckets older than retention_secs are always dropped; when the store
+    holds more than max_entries, older buckets are dropped too, but never one
+    younger than min_retention_secs, so recently seen IDs are never forgotten.
+    Every add is written to sqlite and the recent window is reloaded on start.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, retention_secs: int = 7 * 24 * 3600,
+                 min_retention_secs: int = 24 * 3600, max_entries: int = 1_000_000,
+                 bucket_secs: int = 3600):
+        self.retention_secs = retention_secs
+        self.min_retention_secs = min_retention_secs
+        self.max_entries = max_entries
+        self.bucket_secs = bucket_secs
+        self._ids: Set[int] = set()
+        self._buckets: "OrderedDict[int, List[int]]" = OrderedDict()  # bucket start -> IDs, oldest first
+        self.evicted = 0
+        self._last_disk_prune = 0.0
+
+        self.db = open_state_db(db_path) if db_path else None
+        if self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS processed_tweets ("
+                "tweet_id INTEGER PRIMARY KEY, seen_at REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_processed_seen ON processed_tweets(seen_at)")
+            self.db.commit()
+            self._load()
+
+    def _load(self):
+        cutoff = time.time() - self.retention_secs
+        self.db.execute("DELETE FROM processed_tweets WHERE seen_at < ?", (cutoff,))
+        self.db.commit()
+        rows = self.db.execute("SELECT tweet_id, seen_at FROM processed_tweets ORDER BY seen_at")
+        for tweet_id, seen_at in rows:
+            self._remember(tweet_id, seen_at)
+        self._evict(time.time())
+        logger.info(f"📂 Loaded {len(self._ids)} processed tweet IDs")
+
+    def _remember(self, tweet_id: int, seen_at: float):
+        bucket_start = int(seen_at // self.bucket_secs) * self.bucket_secs
+        bucket = self._buckets.get(bucket_start)
+        if bucket is None:
+            bucket = self._buckets[bucket_start] = []
+        bucket.append(tweet_id)
+        self._ids.add(tweet_id)
+
+    def __contains__(self, tweet_id) -> bool:
+        return int(tweet_id) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, tweet_id) -> bool:
+        """Mark a tweet as processed; returns False if it already was"""
+        tweet_id = int(tweet_id)
+        if tweet_id in self._ids:
+            return False
+
+        now = time.time()
+        self._remember(tweet_id, now)
+        if self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO processed_tweets (tweet_id, seen_at) VALUES (?, ?)", (tweet_id, now)
+            )
+            self.db.commit()
+        self._evict(now)
+        return True
+
+    def _evict(self, now: float):
+        while self._buckets:
+            oldest_start = next(iter(self._buckets))
+            age = now - oldest_start - self.bucket_secs  # age of the newest possible entry in the bucket
+            expired = age > self.retention_secs
+            over_cap = len(self._ids) > self.max_entries and age > self.min_retention_secs
+            if not (expired or over_cap):
+                break
+            for tweet_id in self._buckets.pop(oldest_start):
+                self._ids.discard(tweet_id)
+                self.evicted += 1
+
+        if self.db and now - self._last_disk_prune > self.bucket_secs:
+            self.db.execute("DELETE FROM processed_tweets WHERE seen_at < ?", (now - self.retention_secs,))
+            self.db.commit()
+            self._last_disk_prune = now
+
+    def get_stats(self) -> dict:
+        return {
+            "size": len(self._ids),
+            "buckets": len(self._buckets),
+            "evicted": self.evicted,
+            "max_entries": self.max_entries,
+            "persistent": self.db is not None
+        }
+
+    def close(self):
+        if self.db:
+            self.db.close()
+            self.db = None
+
+
+class CheckpointStore:
+    """Named checkpoints (e.g. the mention since_id) persisted in the state database"""
+
+    def __init__(self, db_path: str):
+        self.db = open_state_db(db_path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "name TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def get(self, name: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM checkpoints WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, name: str, value):
+        self.db.execute(
+            "INSERT OR REPLACE INTO checkpoints (name, value, updated_at) VALUES (?, ?, ?)",
+            (name, str(value), time.time())
+        )
+        self.db.commit()
+
+    def delete(self, name: str):
+        self.db.execute("DELETE FROM checkpoints WHERE name = ?", (name,))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def benchmark_processed_store(count: int = 1_000_000):
+    """Memory and lookup cost of ProcessedTweetStore at `count` IDs (memory only)"""
+    import tracemalloc
+
+    base_id = 1_800_000_000_000_000_000
+    tracemalloc.start()
+    store = ProcessedTweetStore(db_path=None, max_entries=count)
+    started = time.perf_counter()
+    for i in range(count):
+        store.add(base_id + i * 4096)
+    insert_secs = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    hits = sum(1 for i in range(0, count, 10) if (base_id + i * 4096) in store)
+    lookup_ns = (time.perf_counter() - started) / max(hits, 1) * 1e9
+
+    print(f"IDs stored:        {len(store):,}")
+    print(f"Memory (current):  {current / 1024 / 1024:.1f} MiB ({current / count:.0f} bytes/ID)")
+    print(f"Memory (peak):     {peak / 1024 / 1024:.1f} MiB")
+    print(f"Insert time:       {insert_secs:.2f}s ({insert_secs / count * 1e6:.2f} us/ID)")
+    print(f"Lookup time:       {lookup_ns:.0f} ns/lookup")
+
+
+if __name__ == "__main__":
+    benchmark_processed_store()
@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# twitter_bot_polling reads its config at import time
+os.environ.update({
+    "TWITTER_API_KEY": "key",
+    "TWITTER_API_SECRET": "secret",
+    "TWITTER_ACCESS_TOKEN": "token",
+    "TWITTER_ACCESS_SECRET": "token-secret",
+    "TWITTER_BEARER_TOKEN": "bearer",
+    "BOT_USERNAME": "boombot",
+    "LLM_API_URL": "",
+    "MEDIA_API_URL": "",
+    "STATE_DB_PATH": os.path.join(tempfile.mkdtemp(prefix="boom-bot-tests-"), "state.sqlite3"),
+})
+
+
+@pytest.fixture
+def bot():
+    """The polling bot module with its Twitter clients replaced by a FakeTwitter"""
+    from fakes import FakeTwitter
+    import twitter_bot_polling
+
+    fake = FakeTwitter()
+    twitter_bot_polling.client = fake
+    twitter_bot_polling.async_client.client = fake
+    twitter_bot_polling.fake = fake
+    yield twitter_bot_polling
+    for name in ("backlog_since_id", "backlog_until_id", "last_mention_id"):
+        twitter_bot_polling.checkpoints.delete(name)
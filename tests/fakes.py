@@ -0,0 +1,90 @@
+from tweepy import Media, Response, Tweet, User
+
+
+def tweet(tweet_id, text, author_id=1, conversation_id=None, replied_to=None, quoted=None,
+          media_keys=None, entities=None):
+    data = {
+        "id": str(tweet_id),
+        "text": text,
+        "author_id": str(author_id),
+        "edit_history_tweet_ids": [str(tweet_id)],
+        "conversation_id": str(conversation_id or tweet_id),
+        "created_at": "2030-01-01T00:00:00.000Z",
+    }
+    refs = [("replied_to", replied_to), ("quoted", quoted)]
+    if replied_to or quoted:
+        data["referenced_tweets"] = [{"type": kind, "id": str(ref_id)} for kind, ref_id in refs if ref_id]
+    if media_keys:
+        data["attachments"] = {"media_keys": media_keys}
+    if entities:
+        data["entities"] = entities
+    return Tweet(data)
+
+
+def user(user_id, username):
+    return User({"id": str(user_id), "username": username, "name": username.title()})
+
+
+def media(media_key, media_type="photo"):
+    return Media({"media_key": media_key, "type": media_type, "url": f"https://pbs.twimg.com/{media_key}.jpg"})
+
+
+class FakeTwitter:
+    """Synchronous tweepy.Client stand-in that records every call"""
+
+    def __init__(self):
+        self.tweets = {}
+        self.users = {}
+        self.calls = []
+
+    def add(self, *tweets):
+        for item in tweets:
+            self.tweets[str(item.id)] = item
+
+    def _includes(self, tweets):
+        authors = [self.users[str(t.author_id)] for t in tweets if str(t.author_id) in self.users]
+        return {"users": authors} if authors else {}
+
+    def get_tweet(self, id, **kwargs):
+        self.calls.append(("get_tweet", str(id)))
+        found = self.tweets.get(str(id))
+        return Response(found, self._includes([found]) if found else {}, [], {})
+
+    def get_tweets(self, ids, **kwargs):
+        self.calls.append(("get_tweets", tuple(map(str, ids))))
+        found = [self.tweets[str(i)] for i in ids if str(i) in self.tweets]
+        return Response(found or None, self._includes(found), [], {})
+
+    def search_recent_tweets(self, query, **kwargs):
+        self.calls.append(("search_recent_tweets", query, kwargs.get("since_id")))
+        if query.startswith("conversation_id:"):
+            conversation_id = query.split(":", 1)[1]
+            since_id = int(kwargs.get("since_id") or 0)
+            found = [t for t in self.tweets.values()
+                     if str(t.conversation_id) == conversation_id and int(t.id) > since_id]
+            found.sort(key=lambda t: int(t.id), reverse=True)
+            return Response(found or None, self._includes(found), [], {"result_count": len(found)})
+        return Response(None, {}, [], {"result_count": 0})
+
+    def get_users(self, ids=None, **kwargs):
+        self.calls.append(("get_users", tuple(map(str, ids))))
+        found = [self.users[str(i)] for i in ids if str(i) in self.users]
+        return Response(found or None, {}, [], {})
+
+    def create_tweet(self, text=None, in_reply_to_tweet_id=None, **kwargs):
+        self.calls.append(("create_tweet", str(in_reply_to_tweet_id)))
+        return Response({"id": "999", "text": text}, {}, [], {})
+
+
+class AsyncFake:
+    """Awaitable view of a FakeTwitter, like the bot's AsyncTwitterClient"""
+
+    def __init__(self, fake):
+        self.fake = fake
+
+    def __getattr__(self, name):
+        method = getattr(self.fake, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
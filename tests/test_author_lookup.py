@@ -0,0 +1,23 @@
+import asyncio
+
+from tweepy import Response
+
+from fakes import tweet, user
+
+
+def test_unknown_authors_of_a_page_are_looked_up_in_one_call(bot):
+    known = user(61, "known_reader")
+    bot.async_client.users.absorb(Response(None, {"users": [known]}, [], {}))
+    for author_id in (62, 63):
+        bot.fake.users[str(author_id)] = user(author_id, f"reader{author_id}")
+    mentions = [tweet(8601 + i, "@boombot is this real?", author_id=author_id)
+                for i, author_id in enumerate((61, 62, 63, 62))]
+
+    async def main():
+        await bot.hydrate_mention_batch(mentions, {"users": [known]})
+        return [await bot.get_user_info(str(mention.author_id)) for mention in mentions]
+
+    authors = asyncio.run(main())
+    assert [author["username"] for author in authors] == ["known_reader", "reader62", "reader63", "reader62"]
+    lookups = [call for call in bot.fake.calls if call[0] == "get_users"]
+    assert len(lookups) == 1 and sorted(lookups[0][1]) == ["62", "63"]
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import timedelta
+
+from tweepy import Response
+
+from fakes import tweet
+from state_store import snowflake_from_datetime
+
+
+def catchup_floor(bot):
+    return snowflake_from_datetime(bot.bot_start_time - timedelta(seconds=bot.MAX_CATCHUP_SECS))
+
+
+def test_resume_never_goes_back_further_than_catchup_window(bot):
+    floor = catchup_floor(bot)
+    bot.checkpoints.set("last_mention_id", floor - 1000)
+    assert bot.initial_since_id() == floor
+
+    bot.checkpoints.set("last_mention_id", floor + 1000)
+    assert bot.initial_since_id() == floor + 1000
+
+
+def test_backlog_older_than_catchup_window_is_dropped(bot):
+    floor = catchup_floor(bot)
+    bot.checkpoints.set("last_mention_id", floor + 5000)
+    bot.checkpoints.set("backlog_since_id", floor - 5000)
+    bot.checkpoints.set("backlog_until_id", floor - 1000)
+
+    bot.initial_since_id()
+
+    assert bot.checkpoints.get("backlog_since_id") is None
+    assert bot.checkpoints.get("backlog_until_id") is None
+
+
+def test_backlog_straddling_catchup_window_is_clamped(bot):
+    floor = catchup_floor(bot)
+    bot.checkpoints.set("last_mention_id", floor + 5000)
+    bot.checkpoints.set("backlog_since_id", floor - 5000)
+    bot.checkpoints.set("backlog_until_id", floor + 1000)
+
+    bot.initial_since_id()
+
+    assert int(bot.checkpoints.get("backlog_since_id")) == floor
+    assert int(bot.checkpoints.get("backlog_until_id")) == floor + 1000
+
+
+def test_backlog_within_catchup_window_is_kept(bot):
+    floor = catchup_floor(bot)
+    bot.checkpoints.set("backlog_since_id", floor + 10)
+    bot.checkpoints.set("backlog_until_id", floor + 1000)
+
+    bot.initial_since_id()
+
+    assert int(bot.checkpoints.get("backlog_since_id")) == floor + 10
+
+
+def test_multi_page_drain_queues_mentions_oldest_first(bot, monkeypatch):
+    pages = [  # search order: newest page first, newest tweet first within a page
+        [tweet(8400, "@boombot d"), tweet(8300, "@boombot c")],
+        [tweet(8200, "@boombot b"), tweet(8100, "@boombot a")],
+    ]
+    queued = []
+
+    async def iter_pages(since_id, until_id=None):
+        for i, page in enumerate(pages):
+            yield Response(page, {}, [], {"next_token": "more"} if i + 1 < len(pages) else {})
+
+    async def submit(tweet, includes, hydrated=None, url_tweet_ids=None):
+        queued.append(tweet.id)
+
+    monkeypatch.setattr(bot, "iter_mention_pages", iter_pages)
+    monkeypatch.setattr(bot.mention_pool, "submit", submit)
+
+    result = asyncio.run(bot.drain_mentions(8000))
+    assert queued == [8100, 8200, 8300, 8400]
+    assert (result["oldest_id"], result["newest_id"], result["drained"]) == (8100, 8400, True)
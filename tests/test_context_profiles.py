@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from conversation_context import ConversationContextLoader
+from conversation_index import ConversationIndex
+from fakes import AsyncFake, FakeTwitter, tweet
+
+# Mention ID, hydrated tweets: the mention is the conversation root, a reply whose
+# root the poll cycle hydrated, and a reply whose root has to be fetched
+SCENARIOS = {
+    "mention is root": ("100", True),
+    "reply, root hydrated": ("101", True),
+    "reply, root not hydrated": ("101", False),
+}
+
+EXPECTED_CALLS = {
+    "minimal": {"mention is root": [], "reply, root hydrated": [], "reply, root not hydrated": []},
+    "root": {"mention is root": [], "reply, root hydrated": [], "reply, root not hydrated": ["get_tweet"]},
+    "thread": {"mention is root": [], "reply, root hydrated": ["search_recent_tweets"],
+               "reply, root not hydrated": ["get_tweet", "search_recent_tweets"]},
+}
+
+
+def loader_for(bot, profile, index=None):
+    fake = FakeTwitter()
+    fake.add(tweet(100, "viral claim"), tweet(101, "@boombot is this true?", conversation_id=100, replied_to=100))
+    root = bot.build_tweet_content(fake.tweets["100"], {})
+
+    async def fetch_tweet(tweet_id):
+        fake.calls.append(("get_tweet", tweet_id))
+        return root
+
+    return ConversationContextLoader(AsyncFake(fake), fetch_tweet, profile=profile, index=index), fake, root
+
+
+@pytest.mark.parametrize("with_index", [False, True], ids=["no index", "index"])
+@pytest.mark.parametrize("profile", sorted(EXPECTED_CALLS))
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_profile_api_calls(bot, profile, scenario, with_index):
+    loader, fake, root = loader_for(bot, profile, ConversationIndex() if with_index else None)
+    mention_id, root_hydrated = SCENARIOS[scenario]
+
+    context = asyncio.run(loader.load(mention_id, "100", {"100": root} if root_hydrated else {}))
+    assert [call[0] for call in fake.calls] == EXPECTED_CALLS[profile][scenario]
+    assert sum(loader.api_calls.values()) == len(fake.calls)
+    assert (context["original_tweet"] is not None) == (profile != "minimal")
+    if "search_recent_tweets" in EXPECTED_CALLS[profile][scenario]:
+        assert [reply["id"] for reply in context["reply_chain"]] == []  # only the mention and root exist
+
+
+def test_repeat_thread_search_with_index_asks_only_for_newer_replies(bot):
+    loader, fake, root = loader_for(bot, "thread", ConversationIndex())
+    asyncio.run(loader.load("101", "100", {"100": root}))
+    asyncio.run(loader.load("101", "100", {"100": root}))
+
+    assert fake.calls == [("search_recent_tweets", "conversation_id:100", None),
+                          ("search_recent_tweets", "conversation_id:100", 101)]
+    assert loader.get_stats()["api_calls"] == {"root_lookup": 0, "reply_search": 2}
@@ -0,0 +1,62 @@
+import asyncio
+
+from conversation_context import ConversationContextLoader
+from conversation_index import ConversationIndex
+from fakes import AsyncFake, FakeTwitter, tweet
+
+
+def thread_fixture():
+    """Root 100 with replies 120 and 150 (a reply to 120); mention 200 replies to 150"""
+    fake = FakeTwitter()
+    fake.add(tweet(100, "viral claim"), tweet(120, "first reply", conversation_id=100, replied_to=100),
+             tweet(150, "reply to the reply", conversation_id=100, replied_to=120),
+             tweet(200, "@boombot is this true?", conversation_id=100, replied_to=150))
+    return fake
+
+
+def index_as_hydrated(bot, index, fake, *tweet_ids):
+    index.add(bot.build_tweet_content(fake.tweets[str(tweet_id)], {}) for tweet_id in tweet_ids)
+
+
+def test_first_search_of_a_conversation_has_no_since_id(bot):
+    fake, index = thread_fixture(), ConversationIndex()
+    # The hydration stage indexes the root and the mention before the context loads
+    index_as_hydrated(bot, index, fake, 100, 200)
+    loader = ConversationContextLoader(AsyncFake(fake), None, profile="thread", index=index)
+    root = bot.build_tweet_content(fake.tweets["100"], {})
+
+    context = asyncio.run(loader.load(200, 100, {"100": root}))
+    assert [reply["id"] for reply in context["reply_chain"]] == [150, 120]
+    assert fake.calls == [("search_recent_tweets", "conversation_id:100", None)]
+
+
+def test_later_searches_only_ask_for_newer_replies(bot):
+    fake, index = thread_fixture(), ConversationIndex()
+    index_as_hydrated(bot, index, fake, 100, 200)
+    loader = ConversationContextLoader(AsyncFake(fake), None, profile="thread", index=index)
+    root = bot.build_tweet_content(fake.tweets["100"], {})
+    asyncio.run(loader.load(200, 100, {"100": root}))
+
+    fake.add(tweet(205, "newer reply", conversation_id=100, replied_to=100),
+             tweet(210, "@boombot and this?", conversation_id=100, replied_to=120))
+    index_as_hydrated(bot, index, fake, 210)
+    context = asyncio.run(loader.load(210, 100, {"100": root}))
+    assert fake.calls[-1] == ("search_recent_tweets", "conversation_id:100", 200)
+    assert [reply["id"] for reply in context["reply_chain"]][:2] == [120, 205]
+
+
+def test_cached_context_gets_each_mentions_own_ancestors(bot, monkeypatch):
+    fake, index = thread_fixture(), ConversationIndex()
+    fake.add(tweet(210, "@boombot and this?", conversation_id=100, replied_to=120))
+    index_as_hydrated(bot, index, fake, 100, 200, 210)
+    loader = ConversationContextLoader(AsyncFake(fake), None, profile="thread", index=index)
+    monkeypatch.setattr(bot, "context_loader", loader)
+    bot.conversation_cache.clear()
+    root = bot.build_tweet_content(fake.tweets["100"], {})
+
+    first = asyncio.run(bot.get_conversation_context("200", "100", {"100": root}))
+    second = asyncio.run(bot.get_conversation_context("210", "100", {"100": root}))
+    assert [reply["id"] for reply in first["reply_chain"]][0] == 150
+    assert [reply["id"] for reply in second["reply_chain"]][0] == 120
+    assert 210 not in [reply["id"] for reply in second["reply_chain"]]
+    assert len([call for call in fake.calls if call[0] == "search_recent_tweets"]) == 1
@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+from fast_path import DEFAULT_RULES, FastPathResponder, load_rules
+from fakes import tweet, user
+
+
+@pytest.mark.parametrize("text, rule", [
+    ("Hello!", "greeting"), ("hi there", "greeting"), ("Thank you so much 🙏", "thanks"),
+    ("thx", "thanks"), ("help", "help"), ("how does this work?", "help"),
+    ("is this video real?", None), ("hello is this fake", None), ("thanks but is this old?", None),
+])
+def test_only_trivial_mentions_match(text, rule):
+    responder = FastPathResponder()
+    reply = responder.match(text)
+    if rule is None:
+        assert reply is None
+    else:
+        assert reply in next(r["replies"] for r in DEFAULT_RULES if r["name"] == rule)
+        assert responder.get_stats()["by_rule"][rule] == 1
+
+
+def test_replies_to_other_posts_only_match_in_reply_rules():
+    responder = FastPathResponder()
+    assert responder.match("hi", is_reply=True) is None
+    assert responder.match("thanks", is_reply=True) is not None
+
+
+def test_each_rule_rotates_through_its_replies():
+    responder = FastPathResponder()
+    replies = [responder.match("thanks") for _ in range(4)]
+    assert len(set(replies[:3])) == 3
+    assert replies[3] == replies[0]
+
+
+def test_posted_fast_path_texts_are_all_distinct(bot, monkeypatch):
+    queued = []
+    monkeypatch.setattr(bot, "fast_path", FastPathResponder())
+    monkeypatch.setattr(bot.reply_queue, "enqueue", lambda text, tweet_id, **kwargs: queued.append(text))
+    bot.recent_reply_texts.clear()
+    # IDs that all fall on the same variant when it is picked by tweet_id % 3
+    mentions = [tweet(9000 + 3 * i, "@boombot thank you", author_id=50 + i) for i in range(1, 6)]
+    includes = {"users": [user(mention.author_id, f"reader{mention.author_id}") for mention in mentions]}
+
+    async def main():
+        return [await bot.process_mention_with_context(mention, includes) for mention in mentions]
+
+    assert all(asyncio.run(main()))
+    assert len(queued) == 5 and len(set(queued)) == 5
+    assert queued[3] == "@reader54 " + queued[0]
+    assert bot.fake.calls == []
+
+
+def test_fast_path_never_looks_up_an_unknown_author(bot, monkeypatch):
+    responder = FastPathResponder()
+    monkeypatch.setattr(bot, "fast_path", responder)
+    monkeypatch.setattr(bot.reply_queue, "enqueue", lambda text, tweet_id, **kwargs: None)
+    mention = tweet(9100, "@boombot thanks", author_id=77)
+
+    assert bot.known_username(77, {}) is None
+    asyncio.run(bot.process_mention_with_context(mention, {}))
+    # Not answered locally: the mention went on to the normal path
+    assert responder.get_stats()["checked"] == 0
+
+
+def test_rules_with_malformed_patterns_are_skipped():
+    rules = load_rules(json.dumps([
+        {"name": "broken", "pattern": "(thanks", "replies": ["never"]},
+        {"name": "ok", "pattern": "ok+", "replies": ["Got it!"]},
+    ]))
+    assert [rule["name"] for rule in rules] == ["ok"]
+    assert FastPathResponder(rules).match("okkk") == "Got it!"
+    assert load_rules(json.dumps([{"pattern": "[", "replies": ["x"]}])) is DEFAULT_RULES
@@ -0,0 +1,42 @@
+import asyncio
+
+
+def test_prompt_key_separates_conversations(bot):
+    params = {"question": "USER REQUEST: is this fake?", "thread_id": "conversation_1", "using_Twitter": True}
+    same = bot.llm_prompt_key(params, "100")
+    assert bot.llm_prompt_key({**params, "thread_id": "other"}, "100") == same
+    assert bot.llm_prompt_key({**params, "question": "user request:  IS this fake?"}, "100") == same
+    assert bot.llm_prompt_key(params, "200") != same
+
+
+def test_identical_prompts_coalesce_only_within_a_conversation(bot, monkeypatch):
+    calls = []
+
+    async def query(params):
+        calls.append(params)
+        await asyncio.sleep(0.01)
+        return {"response": "It is old."}
+
+    monkeypatch.setattr(bot.llm_client, "query", query)
+    monkeypatch.setattr(bot, "LLM_STREAMING", False)
+    bot.llm_answer_cache.clear()
+    params = {"question": "USER REQUEST: is this fake?", "thread_id": "t"}
+
+    async def main():
+        return await asyncio.gather(
+            bot.query_llm_coalesced(params, "300"),
+            bot.query_llm_coalesced(params, "300"),
+            bot.query_llm_coalesced(params, "301"),
+        )
+
+    answers = asyncio.run(main())
+    assert [answer["response"] for answer in answers] == ["It is old."] * 3
+    assert len(calls) == 2
+
+
+def test_repeated_reply_texts_are_made_distinct(bot):
+    bot.recent_reply_texts.clear()
+    first = bot.distinct_reply_text("This video is from 2019.", "alice")
+    second = bot.distinct_reply_text("This video is from 2019.", "bob")
+    assert first == "This video is from 2019."
+    assert second == "@bob This video is from 2019."
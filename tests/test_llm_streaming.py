@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from aiohttp import web
+
+from llm_client import LLMClient
+
+SENTENCE = "This claim has been checked and the video is older than the event it is said to show."
+ANSWER_WORDS = (" ".join([SENTENCE] * 8)).split()[:120]
+
+
+async def standin_server(word_delay=0.005):
+    """Local LLM API stand-in: /sse and /chunked stream the answer word by word, /json sends it whole"""
+    written = {"/sse": 0, "/chunked": 0}
+    content_types = {"/sse": "text/event-stream", "/chunked": "text/plain; charset=utf-8"}
+
+    async def stream(request, encode):
+        response = web.StreamResponse(headers={"Content-Type": content_types[request.path]})
+        await response.prepare(request)
+        try:
+            for i, word in enumerate(ANSWER_WORDS):
+                await asyncio.sleep(word_delay)
+                await response.write(encode((" " if i else "") + word))
+                written[request.path] += 1
+            if request.path == "/sse":
+                await response.write(b"data: [DONE]\n\n")
+        except ConnectionResetError:
+            pass  # the client stopped reading early
+        return response
+
+    async def sse(request):
+        return await stream(request, lambda text: f"data: {json.dumps({'delta': text})}\n\n".encode())
+
+    async def chunked(request):
+        return await stream(request, str.encode)
+
+    async def whole(request):
+        return web.json_response({"response": " ".join(ANSWER_WORDS)})
+
+    app = web.Application()
+    app.router.add_get("/sse", sse)
+    app.router.add_get("/chunked", chunked)
+    app.router.add_get("/json", whole)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}", written
+
+
+def run_query(path, max_chars=250):
+    async def main():
+        runner, base, written = await standin_server()
+        client = LLMClient(base + path)
+        try:
+            result = await client.query_stream({"question": "Is this video real?"}, max_chars=max_chars)
+            await asyncio.sleep(0.05)  # let the server notice the closed connection
+            return result, client.get_stats(), written
+        finally:
+            await client.close()
+            await runner.cleanup()
+    return asyncio.run(main())
+
+
+def test_sse_stream_stops_reading_once_the_reply_is_long_enough():
+    result, stats, written = run_query("/sse")
+    assert result["streamed"] and result["cut_off"]
+    assert 0 < len(result["response"]) <= 250 and result["response"].endswith(".")
+    assert stats["stream_cutoffs"] == 1 and stats["streams"] == 1
+    assert written["/sse"] < len(ANSWER_WORDS)
+
+
+def test_chunked_stream_stops_reading_once_the_reply_is_long_enough():
+    result, stats, written = run_query("/chunked")
+    assert result["cut_off"]
+    assert 0 < len(result["response"]) <= 250 and result["response"].endswith(".")
+    assert written["/chunked"] < len(ANSWER_WORDS)
+
+
+def test_short_stream_is_read_to_the_end():
+    result, stats, written = run_query("/sse", max_chars=10_000)
+    assert not result["cut_off"]
+    assert result["response"] == " ".join(ANSWER_WORDS)
+    assert stats["stream_cutoffs"] == 0
+
+
+def test_json_reply_is_trimmed_to_a_sentence():
+    result, stats, _ = run_query("/json")
+    assert "cut_off" not in result
+    assert len(result["response"]) <= 250 and result["response"].endswith(".")
@@ -0,0 +1,25 @@
+import itertools
+
+import media_processor
+from media_processor import MediaDescriptionCache
+
+
+def test_disk_tier_is_trimmed_to_max_entries_every_few_puts(tmp_path, monkeypatch):
+    clock = itertools.count(1_000_000)
+    monkeypatch.setattr(media_processor.time, "time", lambda: next(clock))
+    cache = MediaDescriptionCache(tmp_path / "media.sqlite3", max_entries=5, trim_every=4)
+
+    for i in range(7):
+        cache.put([f"media:{i}"], f"description {i}")
+    assert cache.get_stats()["disk_entries"] == 7  # may exceed the cap between trims
+    cache.put(["media:7"], "description 7")
+
+    rows = cache.db.execute("SELECT key FROM media_descriptions ORDER BY created_at").fetchall()
+    assert [key for (key,) in rows] == [f"media:{i}" for i in range(3, 8)]
+    assert cache.get_stats()["trimmed"] == 3
+
+
+def test_cache_uses_the_shared_state_db_setup(tmp_path):
+    cache = MediaDescriptionCache(tmp_path / "media.sqlite3")
+    assert cache.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert cache.db.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
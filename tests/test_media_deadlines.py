@@ -0,0 +1,32 @@
+import asyncio
+
+from fakes import media
+from media_processor import MediaProcessor
+
+
+def test_items_past_the_overall_deadline_are_cancelled_and_awaited(tmp_path, monkeypatch):
+    processor = MediaProcessor(temp_dir=str(tmp_path), overall_timeout=0.05)
+    unwound = []
+
+    async def slow_description(media_url, api_url):
+        try:
+            await asyncio.sleep(10)
+        finally:
+            unwound.append(media_url)
+
+    async def quick_description(media_url, api_url):
+        return "a photo of a crowd"
+
+    async def process(media_url, api_url):
+        return await (slow_description if "slow" in media_url else quick_description)(media_url, api_url)
+
+    monkeypatch.setattr(processor, "_process_media_url", process)
+
+    async def main():
+        outcome = await processor.describe_media([media("3_fast"), media("3_slow")], "http://media.invalid")
+        return outcome, list(unwound)  # what had been cleaned up when describe_media returned
+
+    outcome, unwound_on_return = asyncio.run(main())
+    assert outcome["descriptions"] == ["a photo of a crowd"]
+    assert [failure["media_key"] for failure in outcome["failures"]] == ["3_slow"]
+    assert unwound_on_return == ["https://pbs.twimg.com/3_slow.jpg"]
@@ -0,0 +1,30 @@
+import asyncio
+
+from fakes import media, tweet, user
+
+
+def test_root_and_mention_media_are_described_concurrently(bot, monkeypatch):
+    root = tweet(7100, "viral photo", media_keys=["3_root"])
+    mention = tweet(7200, "@boombot is this real?", author_id=42, conversation_id=7100, replied_to=7100,
+                    media_keys=["3_mention"])
+    bot.fake.users["42"] = user(42, "asker")
+    hydrated = {"7100": bot.build_tweet_content(root, {"media": [media("3_root")]})}
+    active, overlap, described, queued = [0], [0], [], []
+
+    async def describe(media_objects, tweet_id, api_url):
+        active[0] += 1
+        overlap[0] = max(overlap[0], active[0])
+        await asyncio.sleep(0.05)
+        active[0] -= 1
+        described.append(tweet_id)
+        return {"combined_description": f"media of {tweet_id}"}
+
+    monkeypatch.setattr(bot, "MEDIA_API_URL", "http://media.invalid")
+    monkeypatch.setattr(bot.media_processor, "process_tweet_media_complete", describe)
+    monkeypatch.setattr(bot.reply_queue, "enqueue", lambda text, tweet_id, **kwargs: queued.append(tweet_id))
+    bot.conversation_cache.clear()
+
+    assert asyncio.run(bot.process_mention_with_context(mention, {"media": [media("3_mention")]}, hydrated))
+    assert sorted(described) == ["7100", "7200"]
+    assert overlap[0] == 2
+    assert queued == [mention.id]
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+import requests
+import tweepy
+
+from async_twitter_client import AsyncTwitterClient
+from rate_limits import RateLimitBudget
+
+
+class FailingClient:
+    def __init__(self, error):
+        self.error = error
+
+    def get_tweet(self, id, **kwargs):
+        raise self.error
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    response._content = b'{"title": "error"}'
+    return tweepy.HTTPException(response)
+
+
+def available_after_failure(error):
+    budget = RateLimitBudget({"tweet_lookup": (10, 900)})
+    twitter = AsyncTwitterClient(FailingClient(error), max_workers=1, budget=budget)
+    with pytest.raises(type(error)):
+        asyncio.run(twitter.get_tweet("1"))
+    return budget.get_stats()["tweet_lookup"]["available"]
+
+
+@pytest.mark.parametrize("error", [requests.exceptions.ConnectionError("refused"), RuntimeError("executor down")])
+def test_calls_that_never_reach_twitter_give_their_capacity_back(error):
+    assert available_after_failure(error) == 10
+
+
+@pytest.mark.parametrize("error", [http_error(503), requests.exceptions.ReadTimeout("slow")])
+def test_calls_that_reached_twitter_keep_their_capacity_used(error):
+    assert available_after_failure(error) == 9
@@ -0,0 +1,130 @@
+import json
+import asyncio
+
+import pytest
+import requests
+import tweepy
+
+from rate_limits import RateLimitBudget, RateLimitExhausted
+from reply_queue import ReplyQueue, is_duplicate_content
+
+
+def http_error(error_class, status, body):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = "error"
+    response._content = json.dumps(body).encode()
+    return error_class(response)
+
+
+DUPLICATE = {"detail": "You are not allowed to create a Tweet with duplicate content.", "status": 403}
+FORBIDDEN = {"detail": "You are not permitted to perform this action.", "status": 403}
+
+
+class ScriptedPoster:
+    """post() stand-in that raises the scripted errors in order, then succeeds"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.attempts = []
+
+    async def __call__(self, text, in_reply_to_id):
+        self.attempts.append(text)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"id": "999"}
+
+
+def run_queue(poster, tmp_path=None, **kwargs):
+    async def main():
+        queue = ReplyQueue(poster, RateLimitBudget(), db_path=str(tmp_path / "q.sqlite3") if tmp_path else None,
+                           spacing=0.001, burst=10, base_backoff=0.001, max_backoff=0.01, **kwargs)
+        queue.enqueue("Answer text", 101)
+        queue.start()
+        await asyncio.wait_for(queue.join(), timeout=5)
+        await queue.stop()
+        return queue
+    return asyncio.run(main())
+
+
+def test_posts_and_counts():
+    poster = ScriptedPoster()
+    queue = run_queue(poster)
+    assert poster.attempts == ["Answer text"]
+    assert queue.stats["posted"] == 1 and queue.stats["retries"] == 0
+
+
+def test_rate_limit_and_server_errors_are_retried():
+    poster = ScriptedPoster(http_error(tweepy.TooManyRequests, 429, {"title": "Too Many Requests"}),
+                            http_error(tweepy.TwitterServerError, 503, {"title": "Service Unavailable"}))
+    queue = run_queue(poster)
+    assert len(poster.attempts) == 3
+    assert queue.stats["retries"] == 2 and queue.stats["posted"] == 1
+
+
+def test_exhausted_budget_does_not_use_up_attempts():
+    poster = ScriptedPoster(*[RateLimitExhausted("create_tweet", 0.001) for _ in range(5)])
+    queue = run_queue(poster, max_attempts=2)
+    assert queue.stats["posted"] == 1 and queue.stats["failed"] == 0
+
+
+def test_gives_up_after_max_attempts():
+    poster = ScriptedPoster(*[http_error(tweepy.TwitterServerError, 503, {}) for _ in range(5)])
+    queue = run_queue(poster, max_attempts=3)
+    assert len(poster.attempts) == 3
+    assert queue.stats["failed"] == 1 and queue.stats["posted"] == 0
+
+
+def test_backoff_doubles_up_to_the_cap():
+    queue = ReplyQueue(ScriptedPoster(), RateLimitBudget(), base_backoff=10, max_backoff=100)
+    delays = [queue._backoff(attempts) for attempts in (1, 2, 3, 10)]
+    assert 8 <= delays[0] <= 12 and 16 <= delays[1] <= 24 and 32 <= delays[2] <= 48
+    assert delays[3] <= 120
+
+
+def test_other_forbidden_errors_are_dropped():
+    poster = ScriptedPoster(http_error(tweepy.Forbidden, 403, FORBIDDEN))
+    queue = run_queue(poster)
+    assert len(poster.attempts) == 1
+    assert queue.stats["failed"] == 1
+
+
+def test_duplicate_content_is_varied_and_resent(tmp_path):
+    poster = ScriptedPoster(http_error(tweepy.Forbidden, 403, DUPLICATE),
+                            http_error(tweepy.Forbidden, 403, DUPLICATE))
+    queue = run_queue(poster, tmp_path)
+    assert poster.attempts == ["Answer text", "Answer text (2)", "Answer text (3)"]
+    assert queue.stats["posted"] == 1 and queue.stats["duplicate_content_varied"] == 2
+
+
+def test_duplicate_content_gives_up_after_max_variants():
+    poster = ScriptedPoster(*[http_error(tweepy.Forbidden, 403, DUPLICATE) for _ in range(5)])
+    queue = run_queue(poster, max_variants=2)
+    assert len(poster.attempts) == 3
+    assert queue.stats["failed"] == 1
+
+
+@pytest.mark.parametrize("body, expected", [
+    (DUPLICATE, True),
+    ({"errors": [{"code": 187, "message": "Status is a duplicate."}]}, True),
+    (FORBIDDEN, False),
+])
+def test_is_duplicate_content(body, expected):
+    assert is_duplicate_content(http_error(tweepy.Forbidden, 403, body)) is expected
+
+
+def test_pending_replies_survive_a_restart(tmp_path):
+    async def main():
+        db_path = str(tmp_path / "q.sqlite3")
+        first = ReplyQueue(ScriptedPoster(), RateLimitBudget(), db_path=db_path)
+        first.enqueue("Unsent answer", 202)
+        first.close()
+
+        poster = ScriptedPoster()
+        second = ReplyQueue(poster, RateLimitBudget(), db_path=db_path, spacing=0.001)
+        second.start()
+        await asyncio.wait_for(second.join(), timeout=5)
+        await second.stop()
+        second.close()
+        return poster
+    assert asyncio.run(main()).attempts == ["Unsent answer"]
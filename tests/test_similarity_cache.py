@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+from similarity_cache import SimilarQuestionCache, evaluate_threshold, numeric_tokens
+
+
+def test_numeric_tokens_ignore_handles_links_and_separators():
+    assert numeric_tokens("@user1 did this kill 50,000 people? https://t.co/a1b2") == ("50000",)
+    assert numeric_tokens("is this 5k rupees or 10.5?") == ("10.5", "5k")
+
+
+def test_questions_differing_only_in_a_number_do_not_share_answers():
+    cache = SimilarQuestionCache(threshold=0.5)
+    cache.add("is this video from 2019?", ["conversation:1"], "from 2019")
+    assert cache.lookup("is this video from 2019??", ["conversation:1"]) == "from 2019"
+    assert cache.lookup("is this video from 2023?", ["conversation:1"]) is None
+    cache.add("does petrol cost 100 rupees now?", ["conversation:1"], "100")
+    assert cache.lookup("does petrol cost 110 rupees now?", ["conversation:1"]) is None
+
+
+def test_questions_without_refs_are_never_shared():
+    cache = SimilarQuestionCache(threshold=0.5)
+    cache.add("is this video real?", [], "real")
+    cache.add("is this video real?", ["conversation:1"], "real")
+    assert cache.lookup("is this video real?", []) is None
+    assert cache.lookup("is this video real?", ["conversation:2"]) is None
+    assert cache.get_stats()["unscoped"] == 1
+
+
+def test_benchmark_has_no_false_positives_at_the_shipped_threshold(bot):
+    result = evaluate_threshold(bot.SIMILARITY_THRESHOLD)
+    assert result["false_pos"] == 0
+    assert result["wrong_refs_hits"] == 0
+    assert result["recall"] >= 0.7
+
+
+def test_refs_always_include_the_conversation(bot):
+    standalone = SimpleNamespace(id=500, conversation_id=500)
+    refs = bot.similarity_refs(standalone, {"tweet_contents": []}, {"original_tweet": None})
+    assert refs == ["conversation:500"]
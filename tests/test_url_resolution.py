@@ -0,0 +1,38 @@
+import asyncio
+
+from fakes import tweet
+
+
+def test_links_are_resolved_once_per_mention(bot, monkeypatch):
+    bot.fake.add(tweet(300, "shared by entity"), tweet(301, "shared by short link"))
+    mention = tweet(200, "@boombot is this real? https://t.co/abc https://t.co/xyz", entities={
+        "urls": [{"url": "https://t.co/abc", "expanded_url": "https://twitter.com/someone/status/300"}]
+    })
+    resolved = []
+
+    async def resolve(url):
+        resolved.append(url)
+        return "https://twitter.com/other/status/301"
+
+    submitted = []
+
+    async def submit(tweet, includes, hydrated=None, url_tweet_ids=None):
+        submitted.append((tweet, hydrated, url_tweet_ids))
+
+    monkeypatch.setattr(bot.url_resolver, "resolve", resolve)
+    monkeypatch.setattr(bot.mention_pool, "submit", submit)
+    before = dict(bot.url_resolution_stats)
+    response = type("Response", (), {"data": [mention], "includes": {}})()
+
+    async def main():
+        await bot.submit_mention_page(response)
+        tweet_, hydrated, url_tweet_ids = submitted[0]
+        return await bot.process_tweet_urls_in_mention(
+            bot.clean_mention_text(tweet_), hydrated, [], tweet_, url_tweet_ids
+        )
+
+    shared = asyncio.run(main())
+    assert [content["id"] for content in shared["tweet_contents"]] == [300, 301]
+    assert resolved == ["https://t.co/xyz"]
+    assert bot.url_resolution_stats["from_entities"] - before["from_entities"] == 1
+    assert bot.url_resolution_stats["network_fallback"] - before["network_fallback"] == 1
@@ -6,7 +6,8 @@ from fastapi import FastAPI
 from dotenv import load_dotenv
 import tweepy
 import requests
-from datetime import datetime, timedelta
+from async_twitter_client import RateLimitTrackingClient
+from rate_limits import RateLimitBudget
 
 # Load env
 env_loaded = load_dotenv()
@@ -31,13 +32,16 @@ DEFAULT_REPLY               = "Sorry, I can't answer right now."
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "3600"))  # 1 hour default
 MAX_REQUESTS_PER_HOUR = 3  # Very conservative for free tier
 MIN_REQUEST_INTERVAL = 1200  # 20 minutes between requests
+MAX_REQUESTS_PER_DAY = 20  # Ultra-conservative daily limit for free tier
 
-# Rate limiting tracking
-request_times = []
+# Rate limiting: per-endpoint buckets learn the real limits from response headers;
+# every request also draws from the free-tier caps above
+rate_budget = RateLimitBudget(limits={
+    "free_tier_hourly": (1, max(MIN_REQUEST_INTERVAL, 3600 / MAX_REQUESTS_PER_HOUR)),
+    "free_tier_daily": (MAX_REQUESTS_PER_DAY, 24 * 3600)
+})
 last_mention_id = None
 last_dm_id = None
-daily_requests = 0
-last_reset_date = datetime.now().date()
 
 # Validate credentials
 required = [TWITTER_API_KEY, TWITTER_API_SECRET,
@@ -49,8 +53,9 @@ if not all(required):
 if not BOT_USERNAME:
     logger.warning("BOT_USERNAME not set; mention polling may not detect your bot correctly.")
 
-# Tweepy client with rate limit handling
-client = tweepy.Client(
+# Tweepy client with rate limit handling (keeps rate_budget in sync with headers)
+client = RateLimitTrackingClient(
+    budget=rate_budget,
     bearer_token=TWITTER_BEARER_TOKEN,
     consumer_key=TWITTER_API_KEY,
     consumer_secret=TWITTER_API_SECRET,
@@ -59,45 +64,13 @@ client = tweepy.Client(
     wait_on_rate_limit=True
 )
 
-def can_make_request():
-    """Check if we can make a request based on rate limits"""
-    global request_times, daily_requests, last_reset_date
-    
-    current_time = time.time()
-    current_date = datetime.now().date()
-    
-    # Reset daily counter if new day
-    if current_date > last_reset_date:
-        daily_requests = 0
-        last_reset_date = current_date
-        logger.info("Daily request counter reset")
-    
-    # Remove requests older than 1 hour
-    one_hour_ago = current_time - 3600
-    request_times = [t for t in request_times if t > one_hour_ago]
-    
-    # Check hourly limit
-    if len(request_times) >= MAX_REQUESTS_PER_HOUR:
-        logger.warning(f"Hourly limit reached ({MAX_REQUESTS_PER_HOUR} requests)")
-        return False
-    
-    # Check minimum interval since last request
-    if request_times and (current_time - request_times[-1]) < MIN_REQUEST_INTERVAL:
-        logger.info("Minimum interval not met, skipping request")
-        return False
-    
-    # Check if we have any requests left for today (very conservative estimate)
-    if daily_requests >= 20:  # Ultra-conservative daily limit for free tier
-        logger.warning("Daily request limit reached")
-        return False
-    
-    return True
-
-def record_request():
-    """Record that we made a request"""
-    global request_times, daily_requests
-    request_times.append(time.time())
-    daily_requests += 1
+def can_make_request(endpoint: str) -> bool:
+    """Reserve one request on the endpoint's budget and the free-tier caps"""
+    if rate_budget.try_reserve((endpoint, "free_tier_hourly", "free_tier_daily")):
+        return True
+    wait = rate_budget.wait_time((endpoint, "free_tier_hourly", "free_tier_daily"))
+    logger.info(f"No {endpoint} budget left, next request possible in {wait:.0f} seconds")
+    return False
 
 async def fetch_llm_response(question: str, thread_id: str) -> str:
     """Fetch response from LLM API with timeout"""
@@ -127,7 +100,7 @@ async def poll_mentions():
     while True:
         try:
             # Check if we can make a request
-            if not can_make_request():
+            if not can_make_request("search"):
                 logger.info("Rate limit check failed, waiting...")
                 await asyncio.sleep(CHECK_INTERVAL)
                 continue
@@ -144,7 +117,6 @@ async def poll_mentions():
                 params["since_id"] = last_mention_id
             
             response = client.search_recent_tweets(**params)
-            record_request()
             
             if response.data:
                 tweets = list(reversed(response.data))  # Process oldest first
@@ -228,7 +200,7 @@ async def process_mention(tweet):
             response = response[:247] + "..."
         
         # Check if we can make another request to reply
-        if not can_make_request():
+        if not can_make_request("create_tweet"):
             logger.warning("Cannot reply due to rate limits")
             return
         
@@ -238,7 +210,6 @@ async def process_mention(tweet):
             text=reply_text,
             in_reply_to_tweet_id=tweet.id
         )
-        record_request()
         
         logger.info(f"Replied to tweet {tweet.id}")
         
@@ -259,13 +230,13 @@ async def poll_dms():
     
     while True:
         try:
-            if not can_make_request():
+            if not can_make_request("dm_lookup"):
                 await asyncio.sleep(CHECK_INTERVAL * 2)  # Wait longer for DMs
                 continue
             
             logger.info("Checking for new DMs...")
             dms = api_v1.get_direct_messages(count=10)
-            record_request()
+            rate_budget.update_from_headers("dm_lookup", api_v1.last_response.headers)
             
             new_dms = []
             for dm in reversed(dms):
@@ -298,12 +269,12 @@ async def process_dm(dm, api_v1):
         
         response = await fetch_llm_response(question, f"dm_{sender_id}")
         
-        if not can_make_request():
+        if not can_make_request("dm"):
             logger.warning("Cannot reply to DM due to rate limits")
             return
         
         api_v1.send_direct_message(recipient_id=sender_id, text=response)
-        record_request()
+        rate_budget.update_from_headers("dm", api_v1.last_response.headers)
         logger.info(f"Replied to DM from {sender_id}")
         
     except Exception as e:
@@ -339,19 +310,17 @@ def root():
         "mode": "free_tier_polling",
         "last_mention_id": last_mention_id,
         "last_dm_id": last_dm_id,
-        "daily_requests": daily_requests,
-        "hourly_requests": len(request_times),
+        "rate_budget": rate_budget.get_stats(),
         "next_check_in": f"{CHECK_INTERVAL} seconds"
     }
 
 @app.get("/stats")
 def stats():
     return {
-        "daily_requests": daily_requests,
-        "hourly_requests": len(request_times),
-        "last_reset_date": str(last_reset_date),
+        "rate_budget": rate_budget.get_stats(),
         "rate_limits": {
             "max_per_hour": MAX_REQUESTS_PER_HOUR,
+            "max_per_day": MAX_REQUESTS_PER_DAY,
             "min_interval": MIN_REQUEST_INTERVAL,
             "check_interval": CHECK_INTERVAL
         }
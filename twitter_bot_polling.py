@@ -1042,15 +1042,29 @@
 
 
 import os, pytz, re
+import json
 import time
+import hashlib
 import logging
 import asyncio
 from fastapi import FastAPI
 from dotenv import load_dotenv
 import tweepy
-import requests, re
 from datetime import datetime, timedelta
 from media_processor import MediaProcessor
+from async_twitter_client import AsyncTwitterClient, RateLimitTrackingClient, SEARCH_RECENT_ROUTE
+from llm_client import LLMClient
+from url_resolver import ShortUrlResolver
+from cache_utils import TTLCache, SingleFlight
+from poll_scheduler import PollScheduler
+from state_store import ProcessedTweetStore, CheckpointStore, snowflake_from_datetime
+from rate_limits import RateLimitBudget, RateLimitExhausted
+from reply_queue import ReplyQueue
+from similarity_cache import SimilarQuestionCache
+from conversation_context import ConversationContextLoader
+from conversation_index import ConversationIndex
+from context_builder import ContextBuilder
+from fast_path import FastPathResponder, load_rules
 import tempfile
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -1082,14 +1096,88 @@ TWITTER_ACCESS_TOKEN        = os.getenv("TWITTER_ACCESS_TOKEN")
 TWITTER_ACCESS_TOKEN_SECRET = os.getenv("TWITTER_ACCESS_SECRET")
 TWITTER_BEARER_TOKEN        = os.getenv("TWITTER_BEARER_TOKEN")
 BOT_USERNAME                = os.getenv("BOT_USERNAME", "").lower()
-CHECK_INTERVAL              = 900  # 15 minutes = 900 seconds
+CHECK_INTERVAL              = 900  # 15 minutes = 900 seconds (longest idle interval)
+MIN_CHECK_INTERVAL          = int(os.getenv("MIN_CHECK_INTERVAL", "60"))  # shortest interval when busy
+TARGET_MENTIONS_PER_POLL    = float(os.getenv("TARGET_MENTIONS_PER_POLL", "3"))
 LLM_API_URL                 = os.getenv("LLM_API_URL")
 MEDIA_API_URL               = os.getenv("MEDIA_API_URL")
 DEFAULT_REPLY               = "Sorry, I can't answer right now."
 
 # Free tier limits
-MAX_TWEETS_PER_POLL = 20
-DELAY_BETWEEN_REPLIES = 5
+MAX_TWEETS_PER_POLL = 20  # page size for the mention search
+DELAY_BETWEEN_REPLIES = 5  # average spacing of posted replies
+REPLY_BURST           = int(os.getenv("REPLY_BURST", "1"))  # replies that may go out back to back
+REPLY_MAX_ATTEMPTS    = int(os.getenv("REPLY_MAX_ATTEMPTS", "8"))
+MAX_PAGES_PER_POLL    = int(os.getenv("MAX_PAGES_PER_POLL", "10"))
+SEARCH_BUDGET_RESERVE = int(os.getenv("SEARCH_BUDGET_RESERVE", "2"))  # search calls kept for later polls
+
+# Concurrency limits (worker pool size and per-stage caps)
+MENTION_WORKERS      = int(os.getenv("MENTION_WORKERS", "5"))
+MENTION_QUEUE_SIZE   = int(os.getenv("MENTION_QUEUE_SIZE", str(MENTION_WORKERS * 4)))
+MAX_CONCURRENT_FETCH = int(os.getenv("MAX_CONCURRENT_FETCH", "4"))  # Twitter reads per mention
+MAX_CONCURRENT_MEDIA = int(os.getenv("MAX_CONCURRENT_MEDIA", "2"))
+MEDIA_ITEM_CONCURRENCY = int(os.getenv("MEDIA_ITEM_CONCURRENCY", "4"))  # media API calls in flight
+MEDIA_ITEM_TIMEOUT   = float(os.getenv("MEDIA_ITEM_TIMEOUT", "60"))
+MEDIA_DEADLINE       = float(os.getenv("MEDIA_DEADLINE", "120"))  # whole mention's media
+MEDIA_CACHE_TTL      = int(os.getenv("MEDIA_CACHE_TTL", str(7 * 24 * 3600)))
+MEDIA_CACHE_MAX_ENTRIES = int(os.getenv("MEDIA_CACHE_MAX_ENTRIES", "5000"))
+MAX_CONCURRENT_LLM   = int(os.getenv("MAX_CONCURRENT_LLM", "4"))
+TWITTER_IO_WORKERS   = int(os.getenv("TWITTER_IO_WORKERS", "8"))  # threads for blocking tweepy calls
+TWITTER_BUDGET_MAX_WAIT = float(os.getenv("TWITTER_BUDGET_MAX_WAIT", "30"))  # wait for rate-limit budget
+LLM_POOL_SIZE        = int(os.getenv("LLM_POOL_SIZE", "10"))  # keep-alive connections to LLM_API_URL
+LLM_TIMEOUT          = int(os.getenv("LLM_TIMEOUT", "100"))
+LLM_STREAMING        = os.getenv("LLM_STREAMING", "false").lower() == "true"  # stop reading at MAX_REPLY_CHARS
+LLM_STREAM_PARAM     = os.getenv("LLM_STREAM_PARAM", "stream")  # query flag that asks the API to stream
+MAX_REPLY_CHARS      = 250  # reply text limit, leaving room for the @mention
+LLM_REUSE_TTL        = int(os.getenv("LLM_REUSE_TTL", "60"))  # reuse an identical prompt's answer this long
+LLM_REUSE_CACHE_SIZE = int(os.getenv("LLM_REUSE_CACHE_SIZE", "256"))
+REPLY_TEXT_MEMORY_SECS = int(os.getenv("REPLY_TEXT_MEMORY_SECS", str(24 * 3600)))  # window for repeated texts
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))  # 0 disables the near-duplicate cache
+SIMILARITY_CACHE_TTL = int(os.getenv("SIMILARITY_CACHE_TTL", "3600"))
+SIMILARITY_CACHE_SIZE = int(os.getenv("SIMILARITY_CACHE_SIZE", "2000"))
+URL_RESOLVE_TIMEOUT  = float(os.getenv("URL_RESOLVE_TIMEOUT", "5"))
+MAX_CONCURRENT_URL_RESOLVES = int(os.getenv("MAX_CONCURRENT_URL_RESOLVES", "5"))
+
+# Durable bot state (processed IDs survive restarts)
+STATE_DB_PATH           = os.getenv("STATE_DB_PATH", "bot_state.sqlite3")
+PROCESSED_RETENTION_SECS = int(os.getenv("PROCESSED_RETENTION_SECS", str(7 * 24 * 3600)))
+PROCESSED_MAX_ENTRIES   = int(os.getenv("PROCESSED_MAX_ENTRIES", "1000000"))
+MAX_CATCHUP_SECS        = int(os.getenv("MAX_CATCHUP_SECS", "3600"))  # how far back a restart resumes
+
+# Conversation context cache (viral threads get many mentions under one root)
+CONVERSATION_CACHE_TTL  = int(os.getenv("CONVERSATION_CACHE_TTL", "600"))
+CONVERSATION_CACHE_SIZE = int(os.getenv("CONVERSATION_CACHE_SIZE", "512"))
+# Which context fields the prompt uses: minimal (mention only), root (conversation
+# root and its media) or thread (plus recent replies, one extra search per conversation)
+CONTEXT_PROFILE         = os.getenv("CONTEXT_PROFILE", "root")
+
+# LLM prompt size: total token budget and optional per-section overrides as JSON,
+# e.g. {"media": [3, 250]} (section -> [priority, max tokens]; lower priority is kept first)
+PROMPT_TOKEN_BUDGET     = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+PROMPT_SECTION_LIMITS   = {name: tuple(limit) for name, limit in json.loads(os.getenv("PROMPT_SECTION_LIMITS", "{}")).items()}
+
+# LLM thread IDs: "conversation" (one thread per conversation root, so the backend
+# can reuse its cache across mentions), "author_conversation" (per user within a
+# conversation) or "mention" (a new thread for every mention)
+THREAD_ID_STRATEGY      = os.getenv("THREAD_ID_STRATEGY", "conversation")
+
+# Local answers for greetings/thanks/help; FAST_PATH_RULES is inline JSON or a JSON file path
+FAST_PATH_ENABLED       = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+FAST_PATH_RULES         = os.getenv("FAST_PATH_RULES", "")
+
+# Local index of seen tweets by conversation (stored in the state database)
+CONVERSATION_INDEX_RETENTION_SECS = int(os.getenv("CONVERSATION_INDEX_RETENTION_SECS", str(3 * 24 * 3600)))
+CONVERSATION_INDEX_MAX_TWEETS     = int(os.getenv("CONVERSATION_INDEX_MAX_TWEETS", "200000"))
+
+# Tweet lookups (multi-ID lookups accept at most 100 IDs per request)
+TWEET_LOOKUP_BATCH_SIZE = 100
+TWEET_LOOKUP_PARAMS = {
+    "expansions": ["attachments.media_keys", "author_id"],
+    "media_fields": ["media_key", "type", "url", "variants", "alt_text", "width", "height"],
+    "user_fields": ["username", "name"],
+    "tweet_fields": ["author_id", "created_at", "conversation_id", "public_metrics", "attachments",
+                     "entities", "referenced_tweets"]
+}
 
 # Validate credentials
 required = [TWITTER_API_KEY, TWITTER_API_SECRET, TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_TOKEN_SECRET]
@@ -1097,8 +1185,12 @@ if not all(required):
     logger.error("Missing Twitter API credentials in .env")
     raise SystemExit(1)
 
-# Tweepy client
-client = tweepy.Client(
+# Per-endpoint rate-limit budget shared by every Twitter call (learns limits from headers)
+rate_budget = RateLimitBudget()
+
+# Tweepy client (records rate-limit headers per endpoint)
+client = RateLimitTrackingClient(
+    budget=rate_budget,
     bearer_token=TWITTER_BEARER_TOKEN,
     consumer_key=TWITTER_API_KEY,
     consumer_secret=TWITTER_API_SECRET,
@@ -1107,20 +1199,114 @@ client = tweepy.Client(
     wait_on_rate_limit=False
 )
 
+# Non-blocking adapter used by all async code paths
+async_client = AsyncTwitterClient(
+    client,
+    max_workers=TWITTER_IO_WORKERS,
+    budget=rate_budget,
+    max_budget_wait=TWITTER_BUDGET_MAX_WAIT
+)
+
 # Initialize media processor
-media_processor = MediaProcessor()
+media_processor = MediaProcessor(
+    max_concurrency=MEDIA_ITEM_CONCURRENCY,
+    item_timeout=MEDIA_ITEM_TIMEOUT,
+    overall_timeout=MEDIA_DEADLINE,
+    cache_ttl=MEDIA_CACHE_TTL,
+    cache_max_entries=MEDIA_CACHE_MAX_ENTRIES
+)
+
+# Pooled LLM client shared for the process lifetime
+llm_client = LLMClient(LLM_API_URL, timeout=LLM_TIMEOUT, pool_size=LLM_POOL_SIZE,
+                       stream_param=LLM_STREAM_PARAM or None)
+
+# Redirect-only t.co resolver with a shared LRU+TTL cache
+url_resolver = ShortUrlResolver(timeout=URL_RESOLVE_TIMEOUT, max_concurrency=MAX_CONCURRENT_URL_RESOLVES)
 
 # Track processed mentions
 last_mention_id = None
 bot_start_time = datetime.utcnow()
-processed_tweet_ids = set()
+processed_tweet_ids = ProcessedTweetStore(
+    STATE_DB_PATH,
+    retention_secs=PROCESSED_RETENTION_SECS,
+    max_entries=PROCESSED_MAX_ENTRIES
+)
+checkpoints = CheckpointStore(STATE_DB_PATH)
+
+# Per-stage limits shared by all mention workers
+fetch_semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCH)
+media_semaphore = asyncio.Semaphore(MAX_CONCURRENT_MEDIA)
+llm_semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM)
+
+# Conversation contexts keyed by conversation_id; concurrent misses share one fetch
+conversation_cache = TTLCache(maxsize=CONVERSATION_CACHE_SIZE, ttl=CONVERSATION_CACHE_TTL)
+conversation_flights = SingleFlight()
+
+# Every tweet seen (mentions, includes, lookups, conversation searches) by conversation
+conversation_index = ConversationIndex(
+    STATE_DB_PATH,
+    retention_secs=CONVERSATION_INDEX_RETENTION_SECS,
+    max_tweets=CONVERSATION_INDEX_MAX_TWEETS
+)
+context_loader = ConversationContextLoader(
+    async_client,
+    lambda tweet_id: fetch_tweet_content(tweet_id),
+    profile=CONTEXT_PROFILE,
+    index=conversation_index
+)
 
-def resolve_shortened_url(short_url):
-    try:
-        response = requests.get(short_url, allow_redirects=True)
-        return response.url
-    except requests.RequestException:
-        return short_url
+# LLM answers keyed by normalized prompt; identical prompts in flight share one call
+llm_answer_cache = TTLCache(maxsize=LLM_REUSE_CACHE_SIZE, ttl=LLM_REUSE_TTL)
+llm_flights = SingleFlight()
+llm_prompt_stats = {"prompts": 0, "reused": 0}
+
+# Reply texts queued recently: Twitter rejects an account's identical repeated tweets
+recent_reply_texts = TTLCache(maxsize=5000, ttl=REPLY_TEXT_MEMORY_SECS)
+prompt_stats = {"built": 0, "tokens": 0, "truncated": 0, "dropped_sections": 0}
+
+# Trivial mentions answered from a rules table instead of the full pipeline
+fast_path = FastPathResponder(load_rules(FAST_PATH_RULES)) if FAST_PATH_ENABLED else None
+
+# Near-duplicate questions about exactly the same tweets/media share an answer
+similar_questions = SimilarQuestionCache(
+    threshold=SIMILARITY_THRESHOLD,
+    maxsize=SIMILARITY_CACHE_SIZE,
+    ttl=SIMILARITY_CACHE_TTL
+) if SIMILARITY_THRESHOLD > 0 else None
+
+def on_reply_posted(reply, response):
+    """Count a reply once it is actually on Twitter"""
+    response_time = time.time() - reply.created_at
+    performance_metrics["total_mentions_replied"] += 1
+    performance_metrics["last_response_time"] = round(response_time, 2)
+    
+    # Update average response time
+    count = performance_metrics["total_mentions_replied"]
+    prev_avg = performance_metrics["average_response_time_secs"]
+    performance_metrics["average_response_time_secs"] = round(
+        ((prev_avg * (count - 1)) + response_time) / count, 2
+    )
+    logger.info(f"✅ Posted reply to {reply.in_reply_to_id} ({response_time:.1f}s after processing started)")
+
+async def post_reply(text: str, in_reply_to_tweet_id):
+    return await async_client.create_tweet(text=text, in_reply_to_tweet_id=in_reply_to_tweet_id)
+
+# Finished replies are posted by one paced sender with retries (pending ones survive restarts)
+reply_queue = ReplyQueue(
+    post_reply,
+    rate_budget,
+    db_path=STATE_DB_PATH,
+    spacing=DELAY_BETWEEN_REPLIES,
+    burst=REPLY_BURST,
+    max_attempts=REPLY_MAX_ATTEMPTS,
+    on_posted=on_reply_posted
+)
+
+# Links counted by where their tweet IDs came from (entity metadata vs. redirect lookups)
+url_resolution_stats = {"from_entities": 0, "network_fallback": 0}
+# Tweets a poll cycle needed, by whether the search response already carried them
+hydration_stats = {"from_includes": 0, "from_index": 0, "looked_up": 0, "authors_looked_up": 0}
+TWEET_STATUS_URL = re.compile(r'(?:twitter\.com|x\.com)/\w+/status(?:es)?/\d+', re.IGNORECASE)
 
 def extract_tweet_id_from_url(url: str) -> str:
     """
@@ -1128,10 +1314,9 @@ def extract_tweet_id_from_url(url: str) -> str:
     - https://twitter.com/username/status/1234567890
     - https://x.com/username/status/1234567890
     - https://mobile.twitter.com/username/status/1234567890
-    - https://t.co/shortened_url (would need to be resolved first)
+    - https://t.co/shortened_url (must be resolved with url_resolver first)
     """
     try:
-        url = resolve_shortened_url(url)  # Ensure full URL before extracting ID
         # Handle common Twitter URL patterns
         twitter_patterns = [
             r'(?:twitter\.com|x\.com|mobile\.twitter\.com)/\w+/status/(\d+)',
@@ -1150,6 +1335,52 @@ def extract_tweet_id_from_url(url: str) -> str:
         logger.error(f"Error extracting tweet ID from URL {url}: {e}")
         return None
 
+def build_tweet_content(tweet, includes) -> dict:
+    """
+    Build the tweet content dict (text, author, media) for one tweet, picking its
+    author and media out of includes that may be shared by several tweets
+    """
+    includes = includes or {}
+    users = {str(user.id): user for user in includes.get('users', [])}
+    media_lookup = {media.media_key: media for media in includes.get('media', [])}
+    parent_ids = get_referenced_tweet_ids(tweet, 'replied_to')
+    
+    tweet_content = {
+        'id': tweet.id,
+        'text': tweet.text,
+        'created_at': tweet.created_at,
+        'author_id': tweet.author_id,
+        'author': {'username': 'unknown', 'name': 'Unknown'},
+        'conversation_id': getattr(tweet, 'conversation_id', None),
+        'in_reply_to_id': parent_ids[0] if parent_ids else None,
+        'media': [],
+        'media_objects': []
+    }
+    
+    # Get author info
+    author = users.get(str(tweet.author_id))
+    if author:
+        tweet_content['author'] = {
+            'username': author.username,
+            'name': author.name
+        }
+    
+    # Extract media
+    media_keys = (tweet.attachments or {}).get('media_keys', [])
+    for media_key in media_keys:
+        media = media_lookup.get(media_key)
+        if media is None:
+            continue
+        media_info = {
+            'type': media.type,
+            'url': getattr(media, 'url', None),
+            'alt_text': getattr(media, 'alt_text', None)
+        }
+        tweet_content['media'].append(media_info)
+        tweet_content['media_objects'].append(media)
+    
+    return tweet_content
+
 async def fetch_tweet_content(tweet_id: str) -> dict:
     """
     Fetch tweet content including text and media using the tweet ID
@@ -1157,46 +1388,14 @@ async def fetch_tweet_content(tweet_id: str) -> dict:
     try:
         logger.info(f"🔍 Fetching tweet content for ID: {tweet_id}")
         
-        response = client.get_tweet(
-            id=tweet_id,
-            expansions=["attachments.media_keys", "author_id"],
-            media_fields=["media_key", "type", "url", "variants", "alt_text", "width", "height"],
-            user_fields=["username", "name"],
-            tweet_fields=["created_at", "public_metrics", "attachments"]
-        )
+        response = await async_client.get_tweet(id=tweet_id, **TWEET_LOOKUP_PARAMS)
         
         if not response.data:
             logger.warning(f"❌ Tweet {tweet_id} not found or not accessible")
             return None
         
-        tweet = response.data
-        tweet_content = {
-            'id': tweet.id,
-            'text': tweet.text,
-            'created_at': tweet.created_at,
-            'author': {'username': 'unknown', 'name': 'Unknown'},
-            'media': [],
-            'media_objects': []
-        }
-        
-        # Get author info
-        if response.includes and 'users' in response.includes:
-            author = response.includes['users'][0]
-            tweet_content['author'] = {
-                'username': author.username,
-                'name': author.name
-            }
-        
-        # Extract media
-        if response.includes and 'media' in response.includes:
-            for media in response.includes['media']:
-                media_info = {
-                    'type': media.type,
-                    'url': getattr(media, 'url', None),
-                    'alt_text': getattr(media, 'alt_text', None)
-                }
-                tweet_content['media'].append(media_info)
-                tweet_content['media_objects'].append(media)
+        tweet_content = build_tweet_content(response.data, response.includes)
+        conversation_index.add([tweet_content])
         
         logger.info(f"✅ Successfully fetched tweet by @{tweet_content['author']['username']}")
         if tweet_content['media']:
@@ -1214,9 +1413,41 @@ async def fetch_tweet_content(tweet_id: str) -> dict:
         logger.error(f"❌ Error fetching tweet {tweet_id}: {e}")
         return None
 
+async def hydrate_tweets(tweet_ids) -> dict:
+    """
+    Fetch many tweets with multi-ID lookups of up to TWEET_LOOKUP_BATCH_SIZE IDs each.
+    Returns tweet content dicts keyed by string tweet ID; missing or private tweets are absent.
+    """
+    ids = list(dict.fromkeys(str(tweet_id) for tweet_id in tweet_ids))
+    if not ids:
+        return {}
+    
+    batches = [ids[i:i + TWEET_LOOKUP_BATCH_SIZE] for i in range(0, len(ids), TWEET_LOOKUP_BATCH_SIZE)]
+    responses = await asyncio.gather(
+        *(async_client.get_tweets(ids=batch, **TWEET_LOOKUP_PARAMS) for batch in batches),
+        return_exceptions=True
+    )
+    
+    hydrated = {}
+    for batch, response in zip(batches, responses):
+        if isinstance(response, Exception):
+            logger.error(f"❌ Error hydrating {len(batch)} tweets: {response}")
+            continue
+        for tweet in response.data or []:
+            hydrated[str(tweet.id)] = build_tweet_content(tweet, response.includes)
+    conversation_index.add(hydrated.values())
+    
+    logger.info(f"💧 Hydrated {len(hydrated)}/{len(ids)} tweets in {len(batches)} lookup(s)")
+    return hydrated
+
+def get_referenced_tweet_ids(tweet, ref_type: str) -> list:
+    """IDs of tweets this tweet references with the given type (quoted, replied_to, retweeted)"""
+    refs = getattr(tweet, 'referenced_tweets', None) or []
+    return [str(ref.id) for ref in refs if ref.type == ref_type]
+
 def extract_twitter_urls_from_text(text: str) -> list:
     """
-    Extract all Twitter/X URLs from text
+    Extract all Twitter/X URLs from text, including unresolved t.co links
     """
     url_patterns = [
         r'https?://(?:www\.)?(?:twitter\.com|x\.com|mobile\.twitter\.com)/\S+',
@@ -1227,46 +1458,102 @@ def extract_twitter_urls_from_text(text: str) -> list:
     for pattern in url_patterns:
         matches = re.findall(pattern, text, re.IGNORECASE)
         urls.extend(matches)
-       # Resolve shortened links
-    resolved_urls = [resolve_shortened_url(url) for url in urls]
-    return resolved_urls
+    
+    # Drop repeats so each URL is resolved and fetched once per mention
+    return list(dict.fromkeys(urls))
 
-async def process_tweet_urls_in_mention(mention_text: str) -> dict:
+def entity_expanded_urls(tweet) -> dict:
+    """
+    Map each link in a tweet's text to its expanded URL from entities.urls
     """
-    Process any Twitter URLs found in the mention text and extract their content
+    entities = getattr(tweet, 'entities', None) or {}
+    expanded = {}
+    for entity in entities.get('urls', []):
+        short_url = entity.get('url')
+        target = entity.get('unwound_url') or entity.get('expanded_url')
+        if not short_url or not target:
+            continue
+        expanded[short_url] = target
+    return expanded
+
+async def resolve_tweet_urls(mention_text: str, tweet=None) -> list:
     """
+    Return (url, tweet_id) pairs for every tweet link in the text. Links that
+    `tweet`'s entities describe use their expanded_url; only links without
+    entity metadata are resolved over the network (once, concurrently).
+    """
+    twitter_urls = extract_twitter_urls_from_text(mention_text)
+    expanded = entity_expanded_urls(tweet)
+    own_id = str(tweet.id) if tweet is not None else None
+    
+    pairs = []
+    for short_url, target in expanded.items():
+        tweet_id = extract_tweet_id_from_url(target) if TWEET_STATUS_URL.search(target) else None
+        # Attached media links point back at the tweet itself
+        if tweet_id and tweet_id != own_id:
+            pairs.append((short_url, tweet_id))
+    url_resolution_stats["from_entities"] += len(expanded)
+    
+    unresolved = [url for url in twitter_urls if url not in expanded]
+    if unresolved:
+        url_resolution_stats["network_fallback"] += sum(1 for url in unresolved if url_resolver.is_shortened(url))
+        resolved_urls = await asyncio.gather(*(url_resolver.resolve(url) for url in unresolved))
+        pairs.extend((url, extract_tweet_id_from_url(resolved_url)) for url, resolved_url in zip(unresolved, resolved_urls))
+    return pairs
+
+async def process_tweet_urls_in_mention(mention_text: str, hydrated: dict = None, quoted_ids: list = None,
+                                        tweet=None, url_tweet_ids: list = None) -> dict:
+    """
+    Process any Twitter URLs found in the mention text and extract their content.
+    Tweets already present in `hydrated` are used directly instead of being fetched;
+    `quoted_ids` adds quoted tweets as shared tweets. Links are expanded from
+    `tweet`'s entities when available; `url_tweet_ids` are the (url, tweet_id)
+    pairs the hydration stage already resolved.
+    """
+    hydrated = hydrated or {}
     tweet_contents = []
     all_media_objects = []
     
     # Find Twitter URLs in the mention
-    twitter_urls = extract_twitter_urls_from_text(mention_text)
+    if url_tweet_ids is None:
+        url_tweet_ids = await resolve_tweet_urls(mention_text, tweet)
     
-    if not twitter_urls:
+    if not url_tweet_ids and not quoted_ids:
         return {
             'tweet_contents': [],
             'media_objects': [],
             'processed_text': mention_text
         }
     
-    logger.info(f"🔗 Found {len(twitter_urls)} Twitter URLs in mention")
+    if url_tweet_ids:
+        logger.info(f"🔗 Found {len(url_tweet_ids)} Twitter URLs in mention")
+    
+    # Quoted tweets count as shared tweets even when their link is not in the text
+    seen_ids = set()
+    shared = list(url_tweet_ids) + [(None, quoted_id) for quoted_id in (quoted_ids or [])]
     
     # Process each Twitter URL
-    for url in twitter_urls:
-        tweet_id = extract_tweet_id_from_url(url)
+    tweet_urls = []
+    for url, tweet_id in shared:
         if tweet_id:
-            tweet_content = await fetch_tweet_content(tweet_id)
+            if url:
+                tweet_urls.append(url)
+            if tweet_id in seen_ids:
+                continue
+            seen_ids.add(tweet_id)
+            tweet_content = hydrated.get(tweet_id) or await fetch_tweet_content(tweet_id)
             if tweet_content:
                 tweet_contents.append(tweet_content)
                 all_media_objects.extend(tweet_content['media_objects'])
-                logger.info(f"✅ Processed tweet URL: {url}")
+                logger.info(f"✅ Processed shared tweet {tweet_id}")
             else:
-                logger.warning(f"⚠️ Could not fetch content for tweet URL: {url}")
+                logger.warning(f"⚠️ Could not fetch content for shared tweet {tweet_id}")
         else:
             logger.warning(f"⚠️ Could not extract tweet ID from URL: {url}")
     
-    # Remove URLs from the mention text for cleaner processing
+    # Remove tweet URLs (short or full form) from the mention text for cleaner processing
     processed_text = mention_text
-    for url in twitter_urls:
+    for url in tweet_urls:
         processed_text = processed_text.replace(url, "").strip()
     processed_text = re.sub(r'\s+', ' ', processed_text).strip()
     
@@ -1277,11 +1564,16 @@ async def process_tweet_urls_in_mention(mention_text: str) -> dict:
     }
 
 async def build_llm_context_with_tweet_urls(mention_text: str, conversation_context: dict, 
-                                            tweet_url_data: dict, media_description: str = "") -> str:
+                                            tweet_url_data: dict, media_description: str = "",
+                                            root_media_description: str = "") -> str:
     """
-    Build comprehensive context including shared tweet URLs
+    Build comprehensive context including shared tweet URLs, fit to
+    PROMPT_TOKEN_BUDGET (the request and original tweet are kept first, then
+    shared tweets, media descriptions and recent replies). What is the same for
+    every mention in a conversation (the original tweet and its media) comes
+    first so the LLM server can reuse its cached prefix.
     """
-    context_parts = []
+    builder = ContextBuilder(PROMPT_TOKEN_BUDGET, limits=PROMPT_SECTION_LIMITS)
     
     # Add original tweet context (from conversation)
     if conversation_context.get('original_tweet'):
@@ -1289,121 +1581,75 @@ async def build_llm_context_with_tweet_urls(mention_text: str, conversation_cont
         author_info = original.get('author', {})
         author_name = author_info.get('username', 'unknown')
         
-        context_parts.append(f'ORIGINAL TWEET by @{author_name}: "{original["text"]}"')
-        
+        original_parts = [f'ORIGINAL TWEET by @{author_name}: "{original["text"]}"']
         if original.get('media'):
-            context_parts.append(f"[Original tweet has {len(original['media'])} media files]")
+            original_parts.append(f"[Original tweet has {len(original['media'])} media files]")
+        builder.add("original", "\n".join(original_parts))
+    
+    if root_media_description:
+        builder.add("original_media", f"\nORIGINAL TWEET MEDIA: {root_media_description}")
     
     # Add shared tweet URLs content
     if tweet_url_data['tweet_contents']:
-        context_parts.append(f"\nSHARED TWEETS ({len(tweet_url_data['tweet_contents'])} tweets):")
+        shared_parts = [f"\nSHARED TWEETS ({len(tweet_url_data['tweet_contents'])} tweets):"]
         for i, tweet_content in enumerate(tweet_url_data['tweet_contents'], 1):
             author = tweet_content['author']['username']
             text = tweet_content['text'][:200] + "..." if len(tweet_content['text']) > 200 else tweet_content['text']
-            context_parts.append(f"Tweet {i} by @{author}: \"{text}\"")
+            shared_parts.append(f"Tweet {i} by @{author}: \"{text}\"")
             
             if tweet_content['media']:
-                context_parts.append(f"[This tweet has {len(tweet_content['media'])} media files]")
+                shared_parts.append(f"[This tweet has {len(tweet_content['media'])} media files]")
+        builder.add("shared", "\n".join(shared_parts))
     
     # Add media descriptions
     if media_description:
-        context_parts.append(f"\nMEDIA CONTENT: {media_description}")
+        builder.add("media", f"\nMEDIA CONTENT: {media_description}")
+    
+    # Add recent replies (only loaded by the "thread" context profile)
+    if conversation_context.get('reply_chain'):
+        reply_parts = [f"\nRECENT REPLIES ({len(conversation_context['reply_chain'])}):"]
+        for reply in conversation_context['reply_chain']:
+            text = reply['text'][:200] + "..." if len(reply['text']) > 200 else reply['text']
+            reply_parts.append(f'- "{text}"')
+        builder.add("replies", "\n".join(reply_parts))
     
     # Add the processed mention text
     processed_text = tweet_url_data['processed_text']
-    context_parts.append(f"\nUSER REQUEST: {processed_text}")
+    builder.add("request", f"\nUSER REQUEST: {processed_text}")
     
-    return "\n".join(context_parts)
+    built = builder.build()
+    prompt_stats["built"] += 1
+    prompt_stats["tokens"] += built.tokens
+    prompt_stats["truncated"] += bool(built.truncated)
+    prompt_stats["dropped_sections"] += len(built.dropped)
+    return built.text
 
-async def get_conversation_context(mention_tweet_id: str, conversation_id: str) -> dict:
+async def get_conversation_context(mention_tweet_id: str, conversation_id: str, hydrated: dict = None) -> dict:
     """
-    Enhanced function to get the original tweet and full conversation context
-    when someone mentions the bot in a reply
+    Conversation context for a mention, limited to the fields CONTEXT_PROFILE
+    uses. The shared part is cached per conversation and concurrent requests
+    for the same conversation share a single fetch; the mention's own
+    ancestors are added after the cache lookup.
     """
-    context = {
-        'original_tweet': None,
-        'reply_chain': [],
-        'media_content': [],
-        'conversation_summary': ""
-    }
-    
-    try:
-        # Get the original tweet (root of conversation)
-        if conversation_id:
-            logger.info(f"🔍 Fetching original tweet {conversation_id} for context")
-            
-            original_response = client.get_tweet(
-                id=conversation_id,
-                expansions=["attachments.media_keys", "author_id"],
-                media_fields=["media_key", "type", "url", "variants", "alt_text"],
-                user_fields=["username", "name"],
-                tweet_fields=["created_at", "public_metrics", "attachments"]
-            )
-            
-            if original_response.data:
-                original_tweet = original_response.data
-                context['original_tweet'] = {
-                    'id': original_tweet.id,
-                    'text': original_tweet.text,
-                    'author_id': original_tweet.author_id,
-                    'created_at': original_tweet.created_at,
-                    'media': []
-                }
-                
-                # Extract media from original tweet
-                if original_response.includes and 'media' in original_response.includes:
-                    for media in original_response.includes['media']:
-                        media_info = {
-                            'type': media.type,
-                            'url': getattr(media, 'url', None),
-                            'alt_text': getattr(media, 'alt_text', None)
-                        }
-                        context['original_tweet']['media'].append(media_info)
-                        context['media_content'].append(media)
-                
-                # Get author info
-                if original_response.includes and 'users' in original_response.includes:
-                    author = original_response.includes['users'][0]
-                    context['original_tweet']['author'] = {
-                        'username': author.username,
-                        'name': author.name
-                    }
-                
-                logger.info(f"✅ Found original tweet by @{context['original_tweet'].get('author', {}).get('username', 'unknown')}")
-        
-        # Get recent replies in the conversation for additional context
-        try:
-            conversation_search = client.search_recent_tweets(
-                query=f"conversation_id:{conversation_id}",
-                max_results=10,
-                tweet_fields=["author_id", "created_at", "in_reply_to_user_id"],
-                user_fields=["username"],
-                expansions=["author_id"]
-            )
-            
-            if conversation_search.data:
-                context['reply_chain'] = []
-                for reply in conversation_search.data:
-                    reply_info = {
-                        'id': reply.id,
-                        'text': reply.text,
-                        'author_id': reply.author_id,
-                        'created_at': reply.created_at
-                    }
-                    context['reply_chain'].append(reply_info)
-                
-                logger.info(f"📝 Found {len(context['reply_chain'])} replies in conversation")
-        
-        except Exception as e:
-            logger.warning(f"⚠️ Could not fetch conversation replies: {e}")
-    
-    except Exception as e:
-        logger.error(f"❌ Error getting conversation context: {e}")
-    
-    return context
+    cache_key = context_loader.cache_key(mention_tweet_id, conversation_id)
+    context = conversation_cache.get(cache_key)
+    if context is not None:
+        logger.info(f"♻️ Using cached context for conversation {conversation_id}")
+        return context_loader.for_mention(context, mention_tweet_id, conversation_id)
+    
+    async def fetch():
+        fetched = await context_loader.load_conversation(mention_tweet_id, conversation_id, hydrated)
+        # Only cache successful lookups so transient failures are retried
+        if fetched.get('original_tweet') or not context_loader.needs_root:
+            conversation_cache.set(cache_key, fetched)
+        return fetched
+    
+    context = await conversation_flights.do(cache_key, fetch)
+    return context_loader.for_mention(context, mention_tweet_id, conversation_id)
 
 async def fetch_llm_response_enhanced(mention_text: str, thread_id: str, conversation_context: dict, 
-                                    tweet_url_data: dict, media_description: str = "") -> str:
+                                    tweet_url_data: dict, media_description: str = "",
+                                    root_media_description: str = "", conversation_id=None) -> str:
     """Enhanced LLM response with full conversation context and tweet URL content"""
     if not LLM_API_URL:
         return DEFAULT_REPLY
@@ -1411,7 +1657,7 @@ async def fetch_llm_response_enhanced(mention_text: str, thread_id: str, convers
     try:
         # Build comprehensive context including tweet URLs
         full_context = await build_llm_context_with_tweet_urls(
-            mention_text, conversation_context, tweet_url_data, media_description
+            mention_text, conversation_context, tweet_url_data, media_description, root_media_description
         )
         
         logger.info(f"📤 Sending enhanced context with tweet URLs to LLM ({len(full_context)} chars)")
@@ -1430,26 +1676,180 @@ async def fetch_llm_response_enhanced(mention_text: str, thread_id: str, convers
             params["original_tweet_id"] = conversation_context['original_tweet']['id']
             params["conversation_id"] = conversation_context['original_tweet']['id']
         
-        resp = requests.get(LLM_API_URL, params=params, timeout=100)
+        response_json = await query_llm_coalesced(params, conversation_id)
         
-        if resp.status_code == 200:
-            response_json = resp.json()
+        if response_json is not None:
             response_text = response_json.get("response", DEFAULT_REPLY)
             logger.info(f"✅ Enhanced LLM response received: {len(response_text)} characters")
             return response_text
-        else:
-            logger.error(f"❌ LLM API returned status {resp.status_code}")
     
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         logger.error("⏰ LLM request timed out")
     except Exception as e:
         logger.error(f"❌ Enhanced LLM request failed: {e}")
     
     return DEFAULT_REPLY
 
-async def process_mention_with_context(tweet, resp_includes):
+def llm_thread_id(tweet, conversation_id) -> str:
+    """LLM thread for a mention according to THREAD_ID_STRATEGY"""
+    if THREAD_ID_STRATEGY == "author_conversation":
+        return f"{tweet.author_id}_{conversation_id}"
+    if THREAD_ID_STRATEGY == "mention":
+        return f"{tweet.author_id}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+    return f"conversation_{conversation_id}"
+
+def llm_prompt_key(params: dict, conversation_id=None) -> str:
+    """
+    Hash of the prompt, the parameters that shape the answer and the
+    conversation. Whitespace and case are normalized; thread_id is left out so
+    that mentions from different users in one conversation share one answer,
+    while identical prompts from different conversations never do.
+    """
+    normalized = {
+        key: re.sub(r"\s+", " ", value).strip().casefold() if isinstance(value, str) else value
+        for key, value in params.items() if key != "thread_id"
+    }
+    normalized["_streaming"] = LLM_STREAMING
+    normalized["_conversation"] = str(conversation_id or params.get("conversation_id") or "")
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+
+async def query_llm_coalesced(params: dict, conversation_id=None):
+    """
+    Query the LLM, sharing one upstream call between identical prompts in the
+    same conversation that are in flight together and reusing its answer for
+    LLM_REUSE_TTL seconds after
+    """
+    key = llm_prompt_key(params, conversation_id)
+    llm_prompt_stats["prompts"] += 1
+    cached = llm_answer_cache.get(key)
+    if cached is not None:
+        llm_prompt_stats["reused"] += 1
+        logger.info("♻️ Reusing LLM answer for an identical prompt")
+        return cached
+    
+    async def query():
+        async with llm_semaphore:
+            if LLM_STREAMING:
+                # Only a tweet's worth of the answer is used; stop reading there
+                response_json = await llm_client.query_stream(params, max_chars=MAX_REPLY_CHARS)
+            else:
+                response_json = await llm_client.query(params)
+        if response_json is not None:
+            llm_answer_cache.set(key, response_json)
+        return response_json
+    
+    return await llm_flights.do(key, query)
+
+def get_llm_coalescing_stats() -> dict:
+    """Share of prompts answered without their own upstream LLM call"""
+    flights = llm_flights.get_stats()
+    prompts = llm_prompt_stats["prompts"]
+    return {
+        **llm_prompt_stats,
+        "upstream_calls": flights["started"],
+        "shared_in_flight": flights["shared"],
+        "in_flight": flights["in_flight"],
+        "coalescing_ratio": round(1 - flights["started"] / prompts, 3) if prompts else 0.0,
+        "reuse_cache": llm_answer_cache.get_stats()
+    }
+
+def is_plain_mention(tweet) -> bool:
+    """No links, media or quoted tweet: nothing the bot would need to look up"""
+    if (tweet.attachments or {}).get('media_keys') or get_referenced_tweet_ids(tweet, 'quoted'):
+        return False
+    if (getattr(tweet, 'entities', None) or {}).get('urls'):
+        return False
+    return not re.search(r'https?://', tweet.text)
+
+def distinct_reply_text(reply: str, username: str) -> str:
+    """
+    A reply text Twitter will accept as new: a text already queued within
+    REPLY_TEXT_MEMORY_SECS (a shared or reused answer, the default reply) is
+    addressed to the user so each copy differs. The reply queue varies it
+    further if Twitter still reports duplicate content.
+    """
+    if recent_reply_texts.get(reply.casefold()) is not None:
+        reply = f"@{username} {reply}"
+    recent_reply_texts.set(reply.casefold(), True)
+    return reply
+
+def known_username(user_id, includes) -> str:
+    """Username from the response's includes or the user directory (None if unknown); never calls the API"""
+    for user in (includes or {}).get('users', []):
+        if str(user.id) == str(user_id):
+            return user.username
+    known = async_client.users.get(user_id)
+    return known["username"] if known else None
+
+def clean_mention_text(tweet) -> str:
+    """Mention text with the bot handle removed and whitespace collapsed"""
+    text = re.sub(fr"\B@{re.escape(BOT_USERNAME)}\b", "", tweet.text, flags=re.IGNORECASE).strip()
+    return re.sub(r"\s+", " ", text).strip()
+
+async def hydrate_mention_batch(tweets, includes) -> tuple:
+    """
+    Hydration stage for one poll cycle: collect every tweet the mentions need
+    (shared URLs, conversation roots, quoted tweets) and look them up in batches.
+    Tweets the mentions reference directly (replied-to parents, quoted tweets)
+    come with the search response in includes['tweets'] and are never looked up.
+    Authors missing from the user directory are looked up together.
+    Returns the hydrated tweets and each mention's resolved (url, tweet_id) pairs.
+    """
+    includes = includes or {}
+    hydrated = {str(tweet.id): build_tweet_content(tweet, includes) for tweet in includes.get('tweets', [])}
+    conversation_index.add([*hydrated.values(), *(build_tweet_content(tweet, includes) for tweet in tweets)])
+    needed_ids = set()
+    
+    url_results = await asyncio.gather(*(resolve_tweet_urls(clean_mention_text(tweet), tweet) for tweet in tweets))
+    for tweet, url_tweet_ids in zip(tweets, url_results):
+        needed_ids.update(tweet_id for _, tweet_id in url_tweet_ids if tweet_id)
+        needed_ids.update(get_referenced_tweet_ids(tweet, 'quoted'))
+        
+        conversation_id = str(getattr(tweet, 'conversation_id', None) or tweet.id)
+        if not context_loader.needs_root:
+            continue
+        if conversation_id == str(tweet.id):
+            # The mention is its own conversation root and is already in hand
+            hydrated[conversation_id] = build_tweet_content(tweet, includes)
+        else:
+            needed_ids.add(conversation_id)
+    
+    missing_ids = needed_ids - set(hydrated)
+    hydration_stats["from_includes"] += len(needed_ids) - len(missing_ids)
+    
+    # Tweets seen in earlier polls (e.g. the root of a busy thread) come from the local index
+    indexed = conversation_index.get_many(missing_ids)
+    hydrated.update(indexed)
+    missing_ids -= set(indexed)
+    hydration_stats["from_index"] += len(indexed)
+    hydration_stats["looked_up"] += len(missing_ids)
+    
+    # Authors the search did not expand are resolved for the whole page at once,
+    # so workers find every mention's author in the user directory
+    missing_authors = {str(tweet.author_id) for tweet in tweets
+                       if tweet.author_id and async_client.users.get(tweet.author_id) is None}
+    hydration_stats["authors_looked_up"] += len(missing_authors)
+    looked_up, _ = await asyncio.gather(hydrate_tweets(missing_ids), async_client.lookup_users(missing_authors))
+    hydrated.update(looked_up)
+    url_pairs = {str(tweet.id): url_tweet_ids for tweet, url_tweet_ids in zip(tweets, url_results)}
+    return hydrated, url_pairs
+
+def similarity_refs(tweet, tweet_url_data: dict, conversation_context: dict) -> list:
+    """Tweets and media a mention asks about; similar questions share answers only if these match"""
+    refs = [f"conversation:{getattr(tweet, 'conversation_id', None) or tweet.id}"]
+    refs.extend(f"tweet:{content['id']}" for content in tweet_url_data['tweet_contents'])
+    original_tweet = conversation_context.get('original_tweet')
+    if original_tweet and str(original_tweet['id']) != str(tweet.id):
+        refs.append(f"tweet:{original_tweet['id']}")
+    attachments = getattr(tweet, 'attachments', None) or {}
+    refs.extend(f"media:{media_key}" for media_key in attachments.get('media_keys', []))
+    return refs
+
+async def process_mention_with_context(tweet, resp_includes, hydrated: dict = None, url_tweet_ids: list = None):
     """
-    Enhanced mention processing that gets full conversation context and processes tweet URLs
+    Enhanced mention processing that gets full conversation context and processes tweet URLs.
+    `hydrated` holds tweets already looked up for this poll cycle, keyed by ID, and
+    `url_tweet_ids` the mention's links resolved at that stage.
     """
     try:
         tweet_id = str(tweet.id)
@@ -1464,29 +1864,46 @@ async def process_mention_with_context(tweet, resp_includes):
         processed_tweet_ids.add(tweet.id)
         
         # Extract mention text (remove bot username)
-        raw_mention_text = re.sub(fr"\B@{re.escape(BOT_USERNAME)}\b", "", tweet.text, flags=re.IGNORECASE).strip()
-        raw_mention_text = re.sub(r"\s+", " ", raw_mention_text).strip()
+        raw_mention_text = clean_mention_text(tweet)
         if not raw_mention_text:
             raw_mention_text = "Hello!"
         
         logger.info(f"📝 Processing mention {tweet_id}: {raw_mention_text[:50]}...")
         
-        # Process any Twitter URLs in the mention
-        tweet_url_data = await process_tweet_urls_in_mention(raw_mention_text)
-        mention_text = tweet_url_data['processed_text']
-        
-        if tweet_url_data['tweet_contents']:
-            logger.info(f"🔗 Found and processed {len(tweet_url_data['tweet_contents'])} shared tweets")
+        # Greetings, thanks and help requests are answered locally: no lookups, no LLM call.
+        # Canned texts repeat, so the author's username (to keep them distinct) must be at hand too.
+        username = known_username(tweet.author_id, resp_includes) if fast_path and is_plain_mention(tweet) else None
+        if username:
+            is_reply = bool(get_referenced_tweet_ids(tweet, 'replied_to'))
+            reply = fast_path.match(raw_mention_text, is_reply=is_reply)
+            if reply:
+                reply_queue.enqueue(distinct_reply_text(reply, username), tweet.id, started_at=start_time)
+                return True
+        
+        async with fetch_semaphore:
+            # Process any Twitter URLs in the mention
+            tweet_url_data = await process_tweet_urls_in_mention(
+                raw_mention_text, hydrated, get_referenced_tweet_ids(tweet, 'quoted'), tweet, url_tweet_ids
+            )
+            mention_text = tweet_url_data['processed_text']
+            
+            if tweet_url_data['tweet_contents']:
+                logger.info(f"🔗 Found and processed {len(tweet_url_data['tweet_contents'])} shared tweets")
+            
+            # Get conversation context
+            conversation_id = getattr(tweet, 'conversation_id', None) or tweet_id
+            conversation_context = await get_conversation_context(tweet_id, conversation_id, hydrated)
         
-        # Get conversation context
-        conversation_id = getattr(tweet, 'conversation_id', None) or tweet_id
-        conversation_context = await get_conversation_context(tweet_id, conversation_id)
+        # A near-duplicate of an earlier question about the same tweets reuses its answer
+        refs = similarity_refs(tweet, tweet_url_data, conversation_context)
+        reply = similar_questions.lookup(mention_text, refs) if similar_questions else None
         
         # Process media from the mention tweet itself
         media_description = ""
+        root_media_description = ""
         all_media_objects = []
         
-        if MEDIA_API_URL:
+        if MEDIA_API_URL and reply is None:
             # Media from the mention tweet
             mention_media_objects = extract_media_from_tweet_response(tweet, resp_includes)
             all_media_objects.extend(mention_media_objects)
@@ -1494,75 +1911,61 @@ async def process_mention_with_context(tweet, resp_includes):
             # Media from shared tweets
             all_media_objects.extend(tweet_url_data['media_objects'])
             
-            # Media from original tweet if present
-            if conversation_context.get('media_content'):
-                all_media_objects.extend(conversation_context['media_content'])
+            # Media from the original tweet is described on its own: it is the same
+            # for every mention in the conversation and goes in the prompt prefix
+            root_media_objects = [
+                media for media in conversation_context.get('media_content') or []
+                if media not in all_media_objects
+            ]
             
-            # Process all media together
-            if all_media_objects:
-                logger.info(f"🖼️ Processing {len(all_media_objects)} total media files")
-                media_description = await process_tweet_media(tweet_id, all_media_objects)
+            if all_media_objects or root_media_objects:
+                logger.info(f"🖼️ Processing {len(all_media_objects) + len(root_media_objects)} total media files")
+                root_media_description, media_description = await asyncio.gather(
+                    process_tweet_media(str(conversation_id), root_media_objects),
+                    process_tweet_media(tweet_id, all_media_objects)
+                )
         
         # Get user info
-        user_info = await get_user_info(str(tweet.author_id))
+        async with fetch_semaphore:
+            user_info = await get_user_info(str(tweet.author_id))
         username = user_info["username"]
         
-        # Create thread ID
-        author_id = str(tweet.author_id)
-        timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-        thread_id = f"{author_id}_{timestamp}"
-        
-        # Get enhanced LLM response with full context including tweet URLs
-        reply = await fetch_llm_response_enhanced(
-            mention_text, 
-            thread_id, 
-            conversation_context,
-            tweet_url_data,
-            media_description
-        )
+        if reply is None:
+            # Mentions in one conversation share an LLM thread (see THREAD_ID_STRATEGY)
+            thread_id = llm_thread_id(tweet, conversation_id)
+            
+            # Get enhanced LLM response with full context including tweet URLs
+            reply = await fetch_llm_response_enhanced(
+                mention_text, 
+                thread_id, 
+                conversation_context,
+                tweet_url_data,
+                media_description,
+                root_media_description,
+                conversation_id
+            )
+            if similar_questions and reply != DEFAULT_REPLY:
+                similar_questions.add(mention_text, refs, reply)
         
         # Ensure reply fits Twitter's character limit
-        max_reply_length = 250
-        if len(reply) > max_reply_length:
-            reply = reply[:max_reply_length-3] + "..."
+        if len(reply) > MAX_REPLY_CHARS:
+            reply = reply[:MAX_REPLY_CHARS-3] + "..."
+        reply = distinct_reply_text(reply, username)
         
-        # Post reply
-        try:
-            response_tweet = client.create_tweet(
-                text=reply,
-                in_reply_to_tweet_id=tweet.id
-            )
-            
-            # Log success with context info
-            context_info = ""
-            if conversation_context.get('original_tweet'):
-                orig_author = conversation_context['original_tweet'].get('author', {}).get('username', 'unknown')
-                context_info = f" (conversation by @{orig_author})"
-            
-            url_info = f" + {len(tweet_url_data['tweet_contents'])} shared tweets" if tweet_url_data['tweet_contents'] else ""
-            media_info = f" + media" if media_description else ""
-            
-            logger.info(f"✅ Successfully replied to @{username}{context_info}{url_info}{media_info}")
-            end_time = time.time()
-            response_time = end_time - start_time
-            performance_metrics["total_mentions_replied"] += 1
-            performance_metrics["last_response_time"] = round(response_time, 2)
-
-            # Update average response time
-            count = performance_metrics["total_mentions_replied"]
-            prev_avg = performance_metrics["average_response_time_secs"]
-            performance_metrics["average_response_time_secs"] = round(
-                ((prev_avg * (count - 1)) + response_time) / count, 2
-            )
-
-            return True
-            
-        except tweepy.TooManyRequests:
-            logger.warning("⚠️ Rate limit hit on tweet creation")
-            return False
-        except Exception as e:
-            logger.error(f"❌ Error creating reply: {e}")
-            return False
+        # Hand the reply to the posting queue (paced and retried there, never recomputed)
+        reply_queue.enqueue(reply, tweet.id, started_at=start_time)
+        
+        # Log success with context info
+        context_info = ""
+        if conversation_context.get('original_tweet'):
+            orig_author = conversation_context['original_tweet'].get('author', {}).get('username', 'unknown')
+            context_info = f" (conversation by @{orig_author})"
+        
+        url_info = f" + {len(tweet_url_data['tweet_contents'])} shared tweets" if tweet_url_data['tweet_contents'] else ""
+        media_info = f" + media" if media_description or root_media_description else ""
+        
+        logger.info(f"📮 Queued reply to @{username}{context_info}{url_info}{media_info}")
+        return True
     
     except Exception as e:
         logger.error(f"❌ Error processing mention {tweet_id}: {e}")
@@ -1570,6 +1973,71 @@ async def process_mention_with_context(tweet, resp_includes):
 
         return False
 
+class MentionWorkerPool:
+    """Bounded pool of asyncio workers that process queued mentions concurrently"""
+    
+    def __init__(self, worker_count: int, queue_size: int = 0):
+        self.worker_count = max(1, worker_count)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.workers = []
+        self.stats = {
+            "workers": self.worker_count,
+            "queued": 0,
+            "in_flight": 0,
+            "succeeded": 0,
+            "failed": 0
+        }
+    
+    def start(self):
+        """Spawn the worker tasks (idempotent)"""
+        if self.workers:
+            return
+        self.workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        logger.info(f"👷 Started {self.worker_count} mention workers")
+    
+    async def submit(self, tweet, includes, hydrated: dict = None, url_tweet_ids: list = None):
+        """Queue a mention; waits while the queue is full"""
+        await self.queue.put((tweet, includes, hydrated, url_tweet_ids))
+        self.stats["queued"] += 1
+    
+    async def join(self):
+        """Wait until every queued mention has been handled"""
+        await self.queue.join()
+    
+    async def stop(self):
+        """Cancel the worker tasks"""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+    
+    def get_stats(self) -> dict:
+        return {**self.stats, "queue_size": self.queue.qsize()}
+    
+    async def _worker(self, worker_id: int):
+        while True:
+            tweet, includes, hydrated, url_tweet_ids = await self.queue.get()
+            self.stats["in_flight"] += 1
+            try:
+                success = await process_mention_with_context(tweet, includes, hydrated, url_tweet_ids)
+                self.stats["succeeded" if success else "failed"] += 1
+            except Exception as e:
+                logger.error(f"❌ Worker {worker_id} failed on mention {tweet.id}: {e}")
+                self.stats["failed"] += 1
+            finally:
+                self.stats["in_flight"] -= 1
+                self.queue.task_done()
+
+mention_pool = MentionWorkerPool(MENTION_WORKERS, MENTION_QUEUE_SIZE)
+
+# Poll timing adapts to mention arrival rate and the search rate-limit window
+poll_scheduler = PollScheduler(
+    MIN_CHECK_INTERVAL,
+    CHECK_INTERVAL,
+    target_per_poll=TARGET_MENTIONS_PER_POLL,
+    budget_reserve=SEARCH_BUDGET_RESERVE
+)
+
 def extract_media_from_tweet_response(tweet, includes):
     """Extract media objects from tweet response"""
     media_objects = []
@@ -1593,18 +2061,19 @@ def extract_media_from_tweet_response(tweet, includes):
     return media_objects
 
 async def process_tweet_media(tweet_id: str, media_objects) -> str:
-    """Process media from tweet and return description"""
+    """Process media from tweet and return description (each call holds one media_semaphore slot)"""
     if not media_objects or not MEDIA_API_URL:
         return ""
     
     try:
         logger.info(f"🖼️ Processing {len(media_objects)} media files from tweet {tweet_id}")
         
-        result = await media_processor.process_tweet_media_complete(
-            media_objects, 
-            tweet_id, 
-            MEDIA_API_URL
-        )
+        async with media_semaphore:
+            result = await media_processor.process_tweet_media_complete(
+                media_objects, 
+                tweet_id, 
+                MEDIA_API_URL
+            )
         
         if result.get('errors'):
             logger.warning(f"⚠️ Media processing had errors: {result['errors']}")
@@ -1623,14 +2092,11 @@ async def process_tweet_media(tweet_id: str, media_objects) -> str:
         return ""
 
 async def get_user_info(user_id: str) -> dict:
-    """Get user information from user ID"""
+    """Get user information from user ID (user directory first, batched lookup on miss)"""
     try:
-        user = client.get_user(id=user_id)
-        if user.data:
-            return {
-                "username": user.data.username,
-                "name": user.data.name
-            }
+        users = await async_client.lookup_users([user_id])
+        if user_id in users:
+            return users[user_id]
     except Exception as e:
         logger.error(f"Failed to get user info for {user_id}: {e}")
     
@@ -1639,93 +2105,228 @@ async def get_user_info(user_id: str) -> dict:
         "name": "Unknown User"
     }
 
+def clamp_backlog_range(catchup_floor: int):
+    """
+    Keep a saved backlog range within MAX_CATCHUP_SECS, like the main cursor.
+    A range entirely older than the floor is dropped; otherwise its start is
+    raised to the floor (recent search rejects since_ids that are too old, which
+    would fail every poll before it reached fresh mentions).
+    """
+    backlog_since = checkpoints.get("backlog_since_id")
+    backlog_until = checkpoints.get("backlog_until_id")
+    if not (backlog_since and backlog_until):
+        if backlog_since or backlog_until:
+            checkpoints.delete("backlog_since_id")
+            checkpoints.delete("backlog_until_id")
+        return
+    
+    if int(backlog_until) <= catchup_floor:
+        logger.warning(f"⚠️ Dropping backlog {backlog_since}-{backlog_until}: older than MAX_CATCHUP_SECS")
+        checkpoints.delete("backlog_since_id")
+        checkpoints.delete("backlog_until_id")
+    elif int(backlog_since) < catchup_floor:
+        logger.info(f"📚 Clamping backlog start {backlog_since} to {catchup_floor}")
+        checkpoints.set("backlog_since_id", catchup_floor)
+
+def initial_since_id() -> int:
+    """
+    Starting cursor for the mention search. A cold start begins at the snowflake
+    ID for bot_start_time, so the API never returns tweets from before startup.
+    A restart resumes from the saved checkpoint, but never further back than
+    MAX_CATCHUP_SECS.
+    """
+    start_floor = snowflake_from_datetime(bot_start_time)
+    catchup_floor = snowflake_from_datetime(bot_start_time - timedelta(seconds=MAX_CATCHUP_SECS))
+    clamp_backlog_range(catchup_floor)
+    
+    saved = checkpoints.get("last_mention_id")
+    if saved is None:
+        logger.info(f"🆕 No saved checkpoint; starting from snowflake {start_floor}")
+        return start_floor
+    
+    since_id = max(int(saved), catchup_floor)
+    logger.info(f"📌 Resuming from since_id {since_id} (saved checkpoint {saved})")
+    return since_id
+
+MENTION_SEARCH_PARAMS = {
+    "max_results": MAX_TWEETS_PER_POLL,
+    "tweet_fields": ["author_id", "created_at", "conversation_id", "in_reply_to_user_id", "attachments",
+                     "referenced_tweets", "entities"],
+    "user_fields": ["username", "name"],
+    # Referenced tweets (and their authors and media) come back in includes, so a
+    # reply's parent and quoted tweets need no separate lookup
+    "expansions": ["attachments.media_keys", "author_id", "referenced_tweets.id",
+                   "referenced_tweets.id.author_id", "referenced_tweets.id.attachments.media_keys"],
+    "media_fields": ["media_key", "type", "url", "variants", "alt_text"]
+}
+
+async def iter_mention_pages(since_id: int, until_id: int = None):
+    """
+    Yield mention search pages newer than since_id (and older than until_id),
+    newest page first, following meta.next_token until the results are drained,
+    MAX_PAGES_PER_POLL pages were read or the search budget is down to
+    SEARCH_BUDGET_RESERVE. If the drain stopped early the last page still has
+    a next_token.
+    """
+    params = {"query": f"@{BOT_USERNAME} -is:retweet", **MENTION_SEARCH_PARAMS, "since_id": since_id}
+    if until_id:
+        params["until_id"] = until_id
+    
+    for _ in range(MAX_PAGES_PER_POLL):
+        resp = await async_client.search_recent_tweets(**params)
+        yield resp
+        
+        next_token = (resp.meta or {}).get("next_token")
+        if not next_token:
+            return
+        
+        remaining = async_client.get_rate_limit(SEARCH_RECENT_ROUTE).get("remaining")
+        if remaining is not None and remaining <= SEARCH_BUDGET_RESERVE:
+            logger.warning(f"⚠️ Only {remaining} searches left in this window; pausing backlog drain")
+            return
+        params["next_token"] = next_token
+
+async def submit_mention_page(resp) -> int:
+    """Hydrate one page of mentions and queue the unprocessed ones, oldest first"""
+    new_tweets = [tweet for tweet in reversed(resp.data or []) if tweet.id not in processed_tweet_ids]
+    if not new_tweets:
+        return 0
+    
+    # Look up every referenced tweet for the page at once
+    hydrated, url_pairs = await hydrate_mention_batch(new_tweets, resp.includes)
+    for tweet in new_tweets:
+        # Workers process with enhanced context including tweet URLs
+        await mention_pool.submit(tweet, resp.includes, hydrated, url_pairs.get(str(tweet.id)))
+    return len(new_tweets)
+
+async def drain_mentions(since_id: int, until_id: int = None) -> dict:
+    """
+    Read every page of mentions in (since_id, until_id), then queue them to the
+    worker pool oldest first across all pages (search returns the newest page
+    first). A range left partly unread is older than everything queued here and
+    is queued by a later poll. Returns counts, the newest/oldest IDs seen and
+    whether the range was fully drained.
+    """
+    result = {"fetched": 0, "queued": 0, "newest_id": None, "oldest_id": None, "drained": True}
+    pages = []
+    
+    async for resp in iter_mention_pages(since_id, until_id):
+        tweets = resp.data or []
+        if tweets:
+            logger.info(f"📧 Found {len(tweets)} mentions on this page")
+            ids = [tweet.id for tweet in tweets]
+            result["newest_id"] = max(ids + [result["newest_id"] or 0])
+            result["oldest_id"] = min(ids + ([result["oldest_id"]] if result["oldest_id"] else []))
+        result["fetched"] += len(tweets)
+        result["drained"] = not (resp.meta or {}).get("next_token")
+        pages.append(resp)
+    
+    for resp in reversed(pages):
+        result["queued"] += await submit_mention_page(resp)
+    
+    return result
+
+async def poll_cycle() -> int:
+    """
+    One poll: finish any older range left over from a partial drain, then drain
+    everything newer than last_mention_id. Checkpoints are saved only after the
+    queued mentions have been processed. Returns the number of mentions fetched.
+    """
+    global last_mention_id
+    
+    replies_before = mention_pool.stats["succeeded"]
+    fetched = 0
+    drained = True
+    
+    # Older gap left by a previous poll that ran out of pages or budget
+    backlog_since = checkpoints.get("backlog_since_id")
+    backlog_until = checkpoints.get("backlog_until_id")
+    if backlog_since and backlog_until:
+        logger.info(f"📚 Continuing backlog between {backlog_since} and {backlog_until}")
+        backlog = await drain_mentions(int(backlog_since), int(backlog_until))
+        fetched += backlog["fetched"]
+        drained = backlog["drained"]
+        if not drained and backlog["oldest_id"]:
+            backlog_until = backlog["oldest_id"]
+    
+    fresh = None
+    if drained:
+        fresh = await drain_mentions(last_mention_id)
+        fetched += fresh["fetched"]
+    
+    await mention_pool.join()
+    
+    if fresh is not None:
+        if drained:
+            checkpoints.delete("backlog_since_id")
+            checkpoints.delete("backlog_until_id")
+        if not fresh["drained"] and fresh["oldest_id"]:
+            # Remember the unread gap below the oldest tweet we reached
+            checkpoints.set("backlog_since_id", last_mention_id)
+            checkpoints.set("backlog_until_id", fresh["oldest_id"])
+        if fresh["newest_id"]:
+            last_mention_id = max(int(last_mention_id or 0), fresh["newest_id"])
+            checkpoints.set("last_mention_id", last_mention_id)
+    elif backlog_until:
+        checkpoints.set("backlog_until_id", backlog_until)
+    
+    performance_metrics["total_mentions_checked"] += fetched
+    performance_metrics["last_processed_mention_id"] = last_mention_id
+    
+    if not fetched:
+        logger.info("✅ No new mentions found")
+    else:
+        successful_replies = mention_pool.stats["succeeded"] - replies_before
+        logger.info(f"📊 Successfully processed {successful_replies}/{fetched} mentions")
+    return fetched
+
 async def poll_mentions():
     """Enhanced mention polling with conversation context and tweet URL processing"""
     global last_mention_id
     
+    if last_mention_id is None:
+        last_mention_id = initial_since_id()
+    
     logger.info(f"🚀 Starting enhanced mention polling with tweet URL processing")
     logger.info(f"Bot username: @{BOT_USERNAME}")
     logger.info("✨ Features: Conversation context + Tweet URL extraction + Media processing")
     
     await asyncio.sleep(30)  # Initial wait
     
-    query = f"@{BOT_USERNAME} -is:retweet"
     poll_count = 0
     
     while True:
         poll_count += 1
+        poll_scheduler.mark_start()
+        searches_before = async_client.endpoint_stats.get("search_recent_tweets", {}).get("calls", 0)
+        mentions_found = 0
         try:
             logger.info(f"🔍 Enhanced Poll #{poll_count}: Checking for mentions...")
-            
-            params = {
-                "query": query,
-                "max_results": MAX_TWEETS_PER_POLL,
-                "tweet_fields": ["author_id", "created_at", "conversation_id", "in_reply_to_user_id", "attachments"],
-                "user_fields": ["username", "name"],
-                "expansions": ["attachments.media_keys", "author_id"],
-                "media_fields": ["media_key", "type", "url", "variants", "alt_text"]
-            }
-            
-            if last_mention_id:
-                params["since_id"] = last_mention_id
-            
-            try:
-                resp = client.search_recent_tweets(**params)
-                tweets = resp.data if resp.data else []
-                performance_metrics["total_mentions_checked"] += len(tweets)
-                performance_metrics["last_processed_mention_id"] = last_mention_id
-
-            except tweepy.TooManyRequests as e:
-                wait_time = int(e.response.headers.get("x-rate-limit-reset", time.time())) - time.time()
-                wait_time = max(wait_time, 60)
-                logger.warning(f"⚠️ Rate limit hit, sleeping for {wait_time//60} minutes...")
-                await asyncio.sleep(wait_time)
-                continue
-            except Exception as e:
-                logger.error(f"❌ Error searching tweets: {e}")
-                await asyncio.sleep(60)
-                continue
-
-            if not tweets:
-                logger.info("✅ No new mentions found")
-            else:
-                logger.info(f"📧 Found {len(tweets)} new mentions")
-                
-                successful_replies = 0
-                for tweet in reversed(tweets):  # Process oldest first
-                    # Update last_mention_id
-                    last_mention_id = max(int(last_mention_id or 0), tweet.id)
-                    
-                    # Skip old tweets
-                    if tweet.created_at and tweet.created_at.replace(tzinfo=None) < bot_start_time:
-                        logger.info(f"⏭️ Skipping old tweet {tweet.id}")
-                        continue
-                    
-                    # Process with enhanced context including tweet URLs
-                    success = await process_mention_with_context(tweet, resp.includes)
-                    if success:
-                        successful_replies += 1
-                        
-                        # Rate limit delay
-                        if DELAY_BETWEEN_REPLIES > 0:
-                            await asyncio.sleep(DELAY_BETWEEN_REPLIES)
-                
-                logger.info(f"📊 Successfully processed {successful_replies}/{len(tweets)} mentions")
-
+            mentions_found = await poll_cycle()
+        
+        except tweepy.TooManyRequests as e:
+            wait_time = int(e.response.headers.get("x-rate-limit-reset", time.time())) - time.time()
+            wait_time = max(wait_time, 60)
+            logger.warning(f"⚠️ Rate limit hit, sleeping for {wait_time//60} minutes...")
+            await asyncio.sleep(wait_time)
+            continue
+        except RateLimitExhausted as e:
+            wait_time = max(e.retry_after, 60)
+            logger.warning(f"⚠️ {e}; sleeping for {wait_time//60:.0f} minutes...")
+            await asyncio.sleep(wait_time)
+            continue
         except Exception as e:
             logger.error(f"❌ Unexpected error in polling loop: {e}")
             await asyncio.sleep(60)
         
-        # Cleanup
-        if len(processed_tweet_ids) > 1000:
-            processed_tweet_ids.clear()
-            logger.info("🧹 Cleared processed tweet IDs cache")
-        
-        # Wait for next poll
-        next_poll_time = datetime.utcnow() + timedelta(seconds=CHECK_INTERVAL)
-        next_poll_time_ist = next_poll_time.astimezone(IST)
-        logger.info(f"💤 Next poll at {next_poll_time_ist.strftime('%H:%M:%S')}")
-        await asyncio.sleep(CHECK_INTERVAL)
+        # Wait for next poll (fixed-rate from this poll's start)
+        searches_used = async_client.endpoint_stats.get("search_recent_tweets", {}).get("calls", 0) - searches_before
+        poll_scheduler.record_poll(mentions_found, searches_used, async_client.get_rate_limit(SEARCH_RECENT_ROUTE))
+        next_poll_time = datetime.utcnow() + timedelta(seconds=poll_scheduler.seconds_until_next())
+        next_poll_time_ist = next_poll_time.replace(tzinfo=pytz.utc).astimezone(IST)
+        logger.info(f"💤 Next poll at {next_poll_time_ist.strftime('%H:%M:%S')} "
+                    f"(interval {poll_scheduler.interval:.0f}s, {poll_scheduler.last_reason})")
+        await poll_scheduler.wait_next()
 
 # FastAPI app
 app = FastAPI(title="Enhanced Twitter Bot with Tweet URL Processing", version="4.0.0")
@@ -1746,7 +2347,7 @@ async def startup():
     
     # Test API connection
     try:
-        me = client.get_me()
+        me = await async_client.get_me()
         if me.data:
             logger.info(f"✅ Successfully authenticated as @{me.data.username}")
         else:
@@ -1754,15 +2355,27 @@ async def startup():
     except Exception as e:
         logger.error(f"❌ Authentication test error: {e}")
     
-    # Start mention polling
+    # Start mention workers and polling
+    mention_pool.start()
+    reply_queue.start()
+    asyncio.create_task(async_client.monitor_loop_lag())
     asyncio.create_task(poll_mentions())
 
 @app.on_event("shutdown")
 async def shutdown():
     """Cleanup on app shutdown"""
     logger.info("🧹 Cleaning up...")
+    await mention_pool.stop()
+    await reply_queue.stop()
+    async_client.shutdown()
     media_processor.cleanup_all_files()
     await media_processor.cleanup_session()
+    await llm_client.close()
+    await url_resolver.close()
+    processed_tweet_ids.close()
+    checkpoints.close()
+    conversation_index.close()
+    reply_queue.close()
 
 @app.get("/")
 def root():
@@ -1788,7 +2401,29 @@ def get_metrics():
         "bot": BOT_USERNAME,
         "status": "running",
         "timestamp": datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"),
-        "metrics": performance_metrics
+        "metrics": performance_metrics,
+        "worker_pool": mention_pool.get_stats(),
+        "poll_scheduler": poll_scheduler.get_stats(),
+        "twitter_io": async_client.get_stats(),
+        "rate_budget": rate_budget.get_stats(),
+        "llm_client": llm_client.get_stats(),
+        "llm_coalescing": get_llm_coalescing_stats(),
+        "similar_questions": similar_questions.get_stats() if similar_questions else None,
+        "url_resolver": {**url_resolver.get_stats(), "links": url_resolution_stats},
+        "hydration": hydration_stats,
+        "conversation_cache": {**conversation_cache.get_stats(), **conversation_flights.get_stats()},
+        "conversation_context": context_loader.get_stats(),
+        "conversation_index": conversation_index.get_stats(),
+        "fast_path": fast_path.get_stats() if fast_path else None,
+        "prompts": {
+            **prompt_stats,
+            "budget_tokens": PROMPT_TOKEN_BUDGET,
+            "thread_id_strategy": THREAD_ID_STRATEGY,
+            "avg_tokens": round(prompt_stats["tokens"] / prompt_stats["built"]) if prompt_stats["built"] else 0
+        },
+        "media_cache": media_processor.get_cache_stats(),
+        "processed_tweets": processed_tweet_ids.get_stats(),
+        "reply_queue": reply_queue.get_stats()
     }
 
 # @app.get("/ping")
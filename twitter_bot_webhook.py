@@ -13,6 +13,8 @@ from dotenv import load_dotenv
 import tweepy
 import requests
 from typing import Dict, List, Optional
+from async_twitter_client import RateLimitTrackingClient
+from rate_limits import RateLimitBudget
 
 # Load environment variables
 load_dotenv()
@@ -69,8 +71,12 @@ if not BOT_USERNAME:
 
 # Initialize Twitter clients
 try:
-    # v2 API client
-    client_v2 = tweepy.Client(
+    # Per-endpoint budgets learned from response headers, plus the app-wide cap
+    rate_budget = RateLimitBudget(limits={"webhook_total": (RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)})
+    
+    # v2 API client (keeps rate_budget in sync with response headers)
+    client_v2 = RateLimitTrackingClient(
+        budget=rate_budget,
         bearer_token=TWITTER_BEARER_TOKEN,
         consumer_key=TWITTER_API_KEY,
         consumer_secret=TWITTER_API_SECRET,
@@ -92,12 +98,6 @@ except Exception as e:
     logger.error(f"Failed to initialize Twitter clients: {e}")
     raise SystemExit(1)
 
-# Rate limiting tracker
-rate_limit_tracker = {
-    "requests": [],
-    "last_reset": time.time()
-}
-
 # Response cache to avoid duplicate replies
 response_cache = {}
 CACHE_DURATION = 3600  # 1 hour
@@ -108,23 +108,13 @@ class TwitterBot:
         self.processed_dms = set()
         self.start_time = datetime.now()
         
-    def is_rate_limited(self) -> bool:
-        """Check if we're hitting rate limits"""
-        current_time = time.time()
-        
-        # Clean old requests
-        cutoff_time = current_time - RATE_LIMIT_WINDOW
-        rate_limit_tracker["requests"] = [
-            req_time for req_time in rate_limit_tracker["requests"] 
-            if req_time > cutoff_time
-        ]
-        
-        # Check if we're over the limit
-        return len(rate_limit_tracker["requests"]) >= RATE_LIMIT_REQUESTS
+    def reserve_request(self, endpoint: str) -> bool:
+        """Reserve one call on an endpoint's budget and the app-wide cap"""
+        return rate_budget.try_reserve((endpoint, "webhook_total"))
     
-    def record_request(self):
-        """Record a new API request"""
-        rate_limit_tracker["requests"].append(time.time())
+    def is_rate_limited(self) -> bool:
+        """True while the app-wide cap has no capacity left"""
+        return rate_budget.wait_time("webhook_total") > 0
     
     async def get_llm_response(self, question: str, context: str = "") -> str:
         """Get response from LLM API"""
@@ -196,7 +186,7 @@ class TwitterBot:
                 return
             
             # Skip if rate limited
-            if self.is_rate_limited():
+            if not self.reserve_request("create_tweet"):
                 logger.warning("Rate limited, skipping mention")
                 return
             
@@ -234,7 +224,6 @@ class TwitterBot:
                     text=reply_text,
                     in_reply_to_tweet_id=tweet_id
                 )
-                self.record_request()
                 logger.info(f"Replied to mention from @{username}")
                 
             except Exception as e:
@@ -261,7 +250,7 @@ class TwitterBot:
                 return
             
             # Skip if rate limited
-            if self.is_rate_limited():
+            if not self.reserve_request("dm"):
                 logger.warning("Rate limited, skipping DM")
                 return
             
@@ -284,7 +273,7 @@ class TwitterBot:
                     recipient_id=sender_id,
                     text=response
                 )
-                self.record_request()
+                rate_budget.update_from_headers("dm", getattr(client_v1.last_response, "headers", None))
                 logger.info(f"Replied to DM from {sender_id}")
                 
             except Exception as e:
@@ -302,9 +291,11 @@ class TwitterBot:
             follower_id = follow_data.get("id")
             
             if follower_id and follower_id != BOT_USER_ID:
+                if not self.reserve_request("follow"):
+                    logger.warning(f"Rate limited, not following back {follower_id}")
+                    return
                 try:
                     client_v2.follow_user(follower_id)
-                    self.record_request()
                     logger.info(f"Auto-followed user {follower_id}")
                 except Exception as e:
                     logger.error(f"Failed to auto-follow user {follower_id}: {e}")
@@ -428,7 +419,7 @@ async def root():
             "auto_follow": AUTO_FOLLOW_BACK
         },
         "rate_limit": {
-            "requests_in_window": len(rate_limit_tracker["requests"]),
+            "requests_available": rate_budget.get_stats().get("webhook_total", {}).get("available", RATE_LIMIT_REQUESTS),
             "window_seconds": RATE_LIMIT_WINDOW,
             "max_requests": RATE_LIMIT_REQUESTS
         }
@@ -469,10 +460,10 @@ async def stats():
             "cache_entries": len(response_cache)
         },
         "rate_limiting": {
-            "current_window_requests": len(rate_limit_tracker["requests"]),
             "window_duration_seconds": RATE_LIMIT_WINDOW,
             "max_requests_per_window": RATE_LIMIT_REQUESTS,
-            "rate_limited": bot.is_rate_limited()
+            "rate_limited": bot.is_rate_limited(),
+            "endpoints": rate_budget.get_stats()
         },
         "configuration": {
             "reply_to_mentions": REPLY_TO_MENTIONS,